@@ -8,16 +8,21 @@ from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
 from src.config import settings
-from src.database import engine
-from src.middlewares.cronjob import scheduler
+from src.controllers.auth_controller import password_hasher
+from src.controllers.budget_controller import budget_alerts
+from src.database import engine, pg_listener
+from src.middlewares.cronjob import job_runner
 from src.routers import (
     account_router,
     auth_router,
     budget_router,
     categories_router,
+    metrics_router,
     notification_router,
     transactions_router,
 )
+from src.utils.partitions import ensure_partitions
+from src.utils.query_counter import get_query_counter
 from src.utils.universal_errors import get_universal_errors
 
 
@@ -25,8 +30,16 @@ from src.utils.universal_errors import get_universal_errors
 @lru_cache(maxsize=200)
 async def lifespan(app: FastAPI):
     SQLModel.metadata.create_all(engine)
+    ensure_partitions()
+    pg_listener.start()
+    budget_alerts.start()
+    if settings.JOB_RUNNER_IN_PROCESS:
+        job_runner.start()
     yield
-    scheduler.shutdown()
+    job_runner.stop()
+    await budget_alerts.stop()
+    pg_listener.stop()
+    password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -45,6 +58,7 @@ app.add_middleware(
 )
 app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
 app.add_middleware(BaseHTTPMiddleware, dispatch=get_universal_errors())
+app.add_middleware(BaseHTTPMiddleware, dispatch=get_query_counter())
 
 
 @app.get("/")
@@ -61,6 +75,7 @@ routes = [
     budget_router.router,
     notification_router.router,
     notification_router.router_notification,
+    metrics_router.router,
 ]
 
 for route in routes:
@@ -0,0 +1,107 @@
+"""Store blacklisted tokens as a sha256 digest with their exp
+
+Revision ID: 3f1c2a9b7d10
+Revises:
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+
+import hashlib
+import time
+from typing import Sequence, Union
+
+import jwt
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c2a9b7d10"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _columns(bind, table):
+    inspector = sa.inspect(bind)
+    if table not in inspector.get_table_names():
+        return set()
+    return {column["name"] for column in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if "token" not in _columns(bind, "blacklist"):
+        return
+
+    op.add_column(
+        "blacklist",
+        sa.Column("token_hash", sqlmodel.sql.sqltypes.AutoString(length=64)),
+    )
+    op.add_column("blacklist", sa.Column("exp", sa.Integer()))
+
+    rows = bind.execute(
+        sa.text("SELECT id, token FROM blacklist").execution_options(
+            stream_results=True
+        )
+    )
+    update = sa.text(
+        "UPDATE blacklist SET token_hash = :hash, exp = :exp WHERE id = :id"
+    )
+    for batch in rows.partitions(BATCH_SIZE):
+        values = []
+        for row in batch:
+            try:
+                payload = jwt.decode(row.token, options={"verify_signature": False})
+            except jwt.PyJWTError:
+                continue
+            values.append(
+                {
+                    "id": row.id,
+                    "hash": hashlib.sha256(row.token.encode()).hexdigest(),
+                    "exp": int(payload.get("exp", 0)),
+                }
+            )
+        if values:
+            bind.execute(update, values)
+
+    # expired or undecodable tokens can no longer authenticate, drop them now
+    bind.execute(
+        sa.text("DELETE FROM blacklist WHERE exp IS NULL OR exp < :now"),
+        {"now": int(time.time())},
+    )
+    bind.execute(
+        sa.text(
+            "DELETE FROM blacklist a USING blacklist b "
+            "WHERE a.token_hash = b.token_hash AND a.id < b.id"
+        )
+    )
+
+    op.drop_index("ix_blacklist_token", table_name="blacklist", if_exists=True)
+    op.drop_column("blacklist", "token")
+    op.alter_column("blacklist", "token_hash", nullable=False)
+    op.alter_column("blacklist", "exp", nullable=False)
+    op.create_index(
+        op.f("ix_blacklist_token_hash"), "blacklist", ["token_hash"], unique=True
+    )
+    op.create_index(op.f("ix_blacklist_exp"), "blacklist", ["exp"])
+
+
+def downgrade() -> None:
+    # raw tokens cannot be recovered from their digest; revocations are dropped
+    bind = op.get_bind()
+    if "token_hash" not in _columns(bind, "blacklist"):
+        return
+
+    bind.execute(sa.text("DELETE FROM blacklist"))
+    op.drop_index(op.f("ix_blacklist_exp"), table_name="blacklist")
+    op.drop_index(op.f("ix_blacklist_token_hash"), table_name="blacklist")
+    op.drop_column("blacklist", "exp")
+    op.drop_column("blacklist", "token_hash")
+    op.add_column(
+        "blacklist",
+        sa.Column("token", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    )
+    op.create_index(op.f("ix_blacklist_token"), "blacklist", ["token"])
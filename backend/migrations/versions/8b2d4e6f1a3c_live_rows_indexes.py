@@ -0,0 +1,77 @@
+"""Make CommonBase flags non-null and index live rows per user
+
+Revision ID: 8b2d4e6f1a3c
+Revises: 3f1c2a9b7d10
+Create Date: 2026-10-18 13:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8b2d4e6f1a3c"
+down_revision: Union[str, None] = "3f1c2a9b7d10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COMMON_TABLES = (
+    "users",
+    "notifications",
+    "accounts",
+    "categories",
+    "subcategories",
+    "budgets",
+    "blacklist",
+    "transactions",
+)
+LIVE_ROWS_TABLES = (
+    "notifications",
+    "accounts",
+    "categories",
+    "subcategories",
+    "budgets",
+    "transactions",
+)
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    for table in COMMON_TABLES:
+        if table not in existing:
+            continue
+        op.execute(f"UPDATE {table} SET is_active = true WHERE is_active IS NULL")
+        op.execute(f"UPDATE {table} SET is_deleted = false WHERE is_deleted IS NULL")
+        op.alter_column(table, "is_active", nullable=False)
+        op.alter_column(table, "is_deleted", nullable=False)
+
+    for table in LIVE_ROWS_TABLES:
+        if table not in existing:
+            continue
+        op.create_index(
+            f"ix_{table}_user_id_created_at_live",
+            table,
+            ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_where=sa.text("NOT is_deleted"),
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    for table in LIVE_ROWS_TABLES:
+        if table in existing:
+            op.drop_index(
+                f"ix_{table}_user_id_created_at_live",
+                table_name=table,
+                if_exists=True,
+            )
+
+    for table in COMMON_TABLES:
+        if table in existing:
+            op.alter_column(table, "is_active", nullable=True)
+            op.alter_column(table, "is_deleted", nullable=True)
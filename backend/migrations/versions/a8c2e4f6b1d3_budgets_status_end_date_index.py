@@ -0,0 +1,34 @@
+"""Index budgets by status and end date for the expiry job
+
+Revision ID: a8c2e4f6b1d3
+Revises: f7b3d1c5e9a2
+Create Date: 2026-10-18 20:45:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a8c2e4f6b1d3"
+down_revision: Union[str, None] = "f7b3d1c5e9a2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "budgets" not in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_index(
+        "ix_budgets_status_end_date",
+        "budgets",
+        ["status", "end_date"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_budgets_status_end_date", table_name="budgets", if_exists=True)
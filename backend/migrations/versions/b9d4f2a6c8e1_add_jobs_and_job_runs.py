@@ -0,0 +1,62 @@
+"""Add persistent jobs and job run history
+
+Revision ID: b9d4f2a6c8e1
+Revises: a8c2e4f6b1d3
+Create Date: 2026-10-18 23:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b9d4f2a6c8e1"
+down_revision: Union[str, None] = "a8c2e4f6b1d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if "jobs" not in tables:
+        op.create_table(
+            "jobs",
+            sa.Column(
+                "name", sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False
+            ),
+            sa.Column("schedule", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column("next_run_at", sa.DateTime(), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("max_attempts", sa.Integer(), nullable=False),
+            sa.Column("retry_delay_seconds", sa.Integer(), nullable=False),
+            sa.Column("locked_by", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+            sa.Column("locked_until", sa.DateTime(), nullable=True),
+            sa.Column("last_run_at", sa.DateTime(), nullable=True),
+            sa.Column("last_status", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+            sa.PrimaryKeyConstraint("name"),
+        )
+        op.create_index("ix_jobs_next_run_at", "jobs", ["next_run_at"])
+    if "jobruns" not in tables:
+        op.create_table(
+            "jobruns",
+            sa.Column("id", sa.Uuid(), nullable=False),
+            sa.Column("job_name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column("worker", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column("attempt", sa.Integer(), nullable=False),
+            sa.Column("status", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column("started_at", sa.DateTime(), nullable=False),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+            sa.Column("result", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+            sa.Column("error", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+            sa.ForeignKeyConstraint(["job_name"], ["jobs.name"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_jobruns_job_name", "jobruns", ["job_name"])
+
+
+def downgrade() -> None:
+    op.drop_table("jobruns", if_exists=True)
+    op.drop_table("jobs", if_exists=True)
@@ -0,0 +1,58 @@
+"""Add the daily spending rollup and backfill it from transactions
+
+Revision ID: c4e7a1d9f2b6
+Revises: 8b2d4e6f1a3c
+Create Date: 2026-10-18 15:20:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4e7a1d9f2b6"
+down_revision: Union[str, None] = "8b2d4e6f1a3c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "dailyspending" not in existing:
+        op.create_table(
+            "dailyspending",
+            sa.Column("user_id", sa.Uuid(), nullable=False),
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("account_id", sa.Uuid(), nullable=False),
+            sa.Column("category_id", sa.Uuid(), nullable=False),
+            sa.Column("type", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column("total", sa.Float(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.ForeignKeyConstraint(["account_id"], ["accounts.id"]),
+            sa.ForeignKeyConstraint(["category_id"], ["categories.id"]),
+            sa.PrimaryKeyConstraint(
+                "user_id", "day", "account_id", "category_id", "type"
+            ),
+        )
+
+    if "transactions" in existing:
+        op.execute("""
+            INSERT INTO dailyspending
+                (user_id, day, account_id, category_id, type, total, count)
+            SELECT user_id, date(coalesce(transaction_time, created_at)),
+                   account_id, category_id, type, sum(amount), count(*)
+            FROM transactions
+            WHERE NOT is_deleted
+            GROUP BY 1, 2, 3, 4, 5
+            ON CONFLICT (user_id, day, account_id, category_id, type) DO UPDATE
+            SET total = excluded.total, count = excluded.count
+            """)
+
+
+def downgrade() -> None:
+    op.drop_table("dailyspending", if_exists=True)
@@ -0,0 +1,37 @@
+"""Track fired budget alert thresholds
+
+Revision ID: c6e8a3f5d2b7
+Revises: b9d4f2a6c8e1
+Create Date: 2026-10-19 00:20:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c6e8a3f5d2b7"
+down_revision: Union[str, None] = "b9d4f2a6c8e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "budgetalerts" in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        "budgetalerts",
+        sa.Column("budget_id", sa.Uuid(), nullable=False),
+        sa.Column("period_start", sa.DateTime(), nullable=False),
+        sa.Column("threshold", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["budget_id"], ["budgets.id"]),
+        sa.PrimaryKeyConstraint("budget_id", "period_start", "threshold"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("budgetalerts", if_exists=True)
@@ -0,0 +1,162 @@
+"""Partition transactions by month of transaction_time
+
+Revision ID: d5f8b2e0a4c7
+Revises: c4e7a1d9f2b6
+Create Date: 2026-10-18 16:40:00.000000
+
+"""
+
+from datetime import date
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d5f8b2e0a4c7"
+down_revision: Union[str, None] = "c4e7a1d9f2b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+COLUMNS = (
+    "id, is_active, is_deleted, created_at, user_id, account_id, category_id, "
+    "sub_category_id, amount, type, description, transaction_time"
+)
+INDEXES = ("account_id", "category_id", "sub_category_id", "user_id")
+REFERENCES = {
+    "account_id": "accounts.id",
+    "category_id": "categories.id",
+    "sub_category_id": "subcategories.id",
+    "user_id": "users.id",
+}
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def transactions_table(name: str, partitioned: bool) -> None:
+    op.create_table(
+        name,
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("is_deleted", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("account_id", sa.Uuid(), nullable=False),
+        sa.Column("category_id", sa.Uuid(), nullable=False),
+        sa.Column("sub_category_id", sa.Uuid(), nullable=True),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("type", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("description", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("transaction_time", sa.DateTime(), nullable=not partitioned),
+        *(
+            sa.ForeignKeyConstraint(
+                [column], [target], name=f"transactions_{column}_fkey"
+            )
+            for column, target in REFERENCES.items()
+        ),
+        sa.PrimaryKeyConstraint(
+            *(("id", "transaction_time") if partitioned else ("id",)),
+            name="transactions_pkey",
+        ),
+        **(
+            {"postgresql_partition_by": "RANGE (transaction_time)"}
+            if partitioned
+            else {}
+        ),
+    )
+
+
+def create_indexes() -> None:
+    for column in INDEXES:
+        op.create_index(f"ix_transactions_{column}", "transactions", [column])
+    op.create_index(
+        "ix_transactions_user_id_created_at_live",
+        "transactions",
+        ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+        postgresql_where=sa.text("NOT is_deleted"),
+    )
+
+
+def set_aside(name: str) -> None:
+    # frees the table, key and index names for the replacement table
+    for column in INDEXES:
+        op.drop_index(f"ix_transactions_{column}", "transactions", if_exists=True)
+    op.drop_index(
+        "ix_transactions_user_id_created_at_live", "transactions", if_exists=True
+    )
+    for column in REFERENCES:
+        op.drop_constraint(
+            f"transactions_{column}_fkey", "transactions", if_exists=True
+        )
+    op.execute(f"ALTER TABLE transactions RENAME TO {name}")
+    op.execute(f"ALTER TABLE {name} RENAME CONSTRAINT transactions_pkey TO {name}_pkey")
+
+
+def is_partitioned(bind) -> bool:
+    return bool(
+        bind.execute(
+            sa.text(
+                "SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass('transactions')"
+            )
+        ).first()
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if "transactions" not in sa.inspect(bind).get_table_names():
+        return
+    if is_partitioned(bind):
+        return
+
+    set_aside("transactions_unpartitioned")
+    transactions_table("transactions", partitioned=True)
+
+    first = bind.execute(
+        sa.text(
+            "SELECT min(date_trunc('month', coalesce(transaction_time, created_at)))"
+            "::date FROM transactions_unpartitioned"
+        )
+    ).scalar()
+    current = date.today().replace(day=1)
+    month, last = min(first or current, current), add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE transactions_p{month:%Y%m} PARTITION OF transactions "
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        )
+        month = add_months(month, 1)
+    op.execute("CREATE TABLE transactions_default PARTITION OF transactions DEFAULT")
+
+    backfilled = COLUMNS.replace(
+        "transaction_time", "coalesce(transaction_time, created_at)"
+    )
+    op.execute(
+        f"INSERT INTO transactions ({COLUMNS}) "
+        f"SELECT {backfilled} FROM transactions_unpartitioned"
+    )
+    op.drop_table("transactions_unpartitioned")
+    create_indexes()
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if "transactions" not in sa.inspect(bind).get_table_names():
+        return
+    if not is_partitioned(bind):
+        return
+
+    set_aside("transactions_partitioned")
+    transactions_table("transactions", partitioned=False)
+    op.execute(
+        f"INSERT INTO transactions ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM transactions_partitioned"
+    )
+    op.execute("DROP TABLE transactions_partitioned CASCADE")
+    create_indexes()
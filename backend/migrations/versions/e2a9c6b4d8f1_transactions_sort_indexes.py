@@ -0,0 +1,56 @@
+"""Index transactions by transaction time and amount per user
+
+Revision ID: e2a9c6b4d8f1
+Revises: d5f8b2e0a4c7
+Create Date: 2026-10-18 18:05:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2a9c6b4d8f1"
+down_revision: Union[str, None] = "d5f8b2e0a4c7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SORT_COLUMNS = ("transaction_time", "amount")
+
+
+def live_rows_index(column: str) -> None:
+    op.create_index(
+        f"ix_transactions_user_id_{column}_live",
+        "transactions",
+        ["user_id", sa.text(f"{column} DESC"), sa.text("id DESC")],
+        postgresql_where=sa.text("NOT is_deleted"),
+        if_not_exists=True,
+    )
+
+
+def upgrade() -> None:
+    if "transactions" not in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    for column in SORT_COLUMNS:
+        live_rows_index(column)
+    op.drop_index(
+        "ix_transactions_user_id_created_at_live",
+        table_name="transactions",
+        if_exists=True,
+    )
+
+
+def downgrade() -> None:
+    if "transactions" not in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    live_rows_index("created_at")
+    for column in SORT_COLUMNS:
+        op.drop_index(
+            f"ix_transactions_user_id_{column}_live",
+            table_name="transactions",
+            if_exists=True,
+        )
@@ -0,0 +1,45 @@
+"""Add idempotency keys for transaction creation
+
+Revision ID: f7b3d1c5e9a2
+Revises: e2a9c6b4d8f1
+Create Date: 2026-10-18 19:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "f7b3d1c5e9a2"
+down_revision: Union[str, None] = "e2a9c6b4d8f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "idempotencykeys" in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        "idempotencykeys",
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("key", sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column(
+            "fingerprint", sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False
+        ),
+        sa.Column("status_code", sa.Integer(), nullable=True),
+        sa.Column("response", postgresql.JSONB(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "key"),
+    )
+    op.create_index("ix_idempotencykeys_expires_at", "idempotencykeys", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("idempotencykeys", if_exists=True)
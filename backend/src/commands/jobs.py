@@ -0,0 +1,64 @@
+import argparse
+from datetime import datetime
+
+from sqlmodel import Session, select, update
+
+from src.database import engine
+from src.middlewares.cronjob import job_runner
+from src.models.models import JobRuns, Jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run and inspect scheduled jobs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("run", help="run due jobs until interrupted")
+    commands.add_parser("run-pending", help="run the jobs that are due, then exit")
+    commands.add_parser("list", help="show every job and its next run")
+    history = commands.add_parser("history", help="show recent job runs")
+    history.add_argument("--job", default=None)
+    history.add_argument("--limit", type=int, default=20)
+    trigger = commands.add_parser("trigger", help="make a job due now")
+    trigger.add_argument("name", choices=sorted(job_runner.jobs))
+    args = parser.parse_args()
+
+    if args.command == "run":
+        try:
+            job_runner.run_forever()
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "run-pending":
+        job_runner.sync()
+        print(f"Ran {job_runner.run_pending()} jobs")
+    elif args.command == "list":
+        with Session(engine) as session:
+            for job in session.exec(select(Jobs).order_by(Jobs.next_run_at)):
+                print(
+                    f"{job.name:<24} {job.schedule:<12} next {job.next_run_at:%Y-%m-%d %H:%M} "
+                    f"last {job.last_status or '-'} attempts {job.attempts}"
+                    + (f" locked by {job.locked_by}" if job.locked_by else "")
+                )
+    elif args.command == "history":
+        query = select(JobRuns).order_by(JobRuns.started_at.desc()).limit(args.limit)
+        if args.job:
+            query = query.where(JobRuns.job_name == args.job)
+        with Session(engine) as session:
+            for run in session.exec(query):
+                print(
+                    f"{run.started_at:%Y-%m-%d %H:%M:%S} {run.job_name:<24} "
+                    f"{run.status:<9} attempt {run.attempt} on {run.worker}: "
+                    f"{run.result or (run.error or '').strip().splitlines()[-1:]}"
+                )
+    elif args.command == "trigger":
+        job_runner.sync()
+        with Session(engine) as session:
+            session.exec(
+                update(Jobs)
+                .where(Jobs.name == args.name)
+                .values(next_run_at=datetime.now(), attempts=0)
+            )
+            session.commit()
+        print(f"{args.name} is due now")
+
+
+if __name__ == "__main__":
+    main()
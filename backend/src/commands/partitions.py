@@ -0,0 +1,78 @@
+import argparse
+import sys
+from datetime import date, datetime
+from uuid import UUID
+
+from sqlmodel import Session, select
+
+from src.config import settings
+from src.controllers.transactions_controller import filter_clauses
+from src.database import engine
+from src.models.models import Transactions
+from src.schemas.transactions_schema import TransactionFilters
+from src.utils.partitions import (
+    detach_partitions,
+    ensure_partitions,
+    list_partitions,
+    scanned_partitions,
+)
+
+
+def month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage transaction partitions")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ensure = commands.add_parser("ensure", help="create upcoming monthly partitions")
+    ensure.add_argument(
+        "--months-ahead", type=int, default=settings.TRANSACTION_PARTITIONS_AHEAD
+    )
+
+    commands.add_parser("list", help="list attached partitions")
+
+    detach = commands.add_parser(
+        "detach", help="detach partitions that end on or before a month"
+    )
+    detach.add_argument("--before", type=month, required=True, help="YYYY-MM")
+
+    explain = commands.add_parser(
+        "explain", help="show which partitions a filtered transactions query scans"
+    )
+    explain.add_argument("--start", type=datetime.fromisoformat, required=True)
+    explain.add_argument("--end", type=datetime.fromisoformat, required=True)
+    explain.add_argument("--user-id", type=UUID, default=UUID(int=0))
+
+    args = parser.parse_args()
+
+    if args.command == "ensure":
+        created = ensure_partitions(args.months_ahead)
+        print(f"Created {len(created)} partitions: {', '.join(created) or '-'}")
+    elif args.command == "list":
+        with Session(engine) as session:
+            print("\n".join(list_partitions(session)))
+    elif args.command == "detach":
+        detached = detach_partitions(args.before)
+        print(f"Detached {len(detached)} partitions: {', '.join(detached) or '-'}")
+    elif args.command == "explain":
+        with Session(engine) as session:
+            attached = list_partitions(session)
+        scanned = scanned_partitions(
+            select(Transactions.id).where(
+                *filter_clauses(
+                    TransactionFilters(
+                        user_id=args.user_id, start_date=args.start, end_date=args.end
+                    )
+                )
+            )
+        )
+        print(
+            f"Scans {len(scanned)} of {len(attached)} partitions: {', '.join(scanned)}"
+        )
+        sys.exit(1 if attached and len(scanned) == len(attached) > 1 else 0)
+
+
+if __name__ == "__main__":
+    main()
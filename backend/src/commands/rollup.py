@@ -0,0 +1,121 @@
+import argparse
+import sys
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, literal_column, or_, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, delete, select
+
+from src.database import engine
+from src.models.models import DailySpending, Transactions
+
+ROLLUP_KEY = ("user_id", "day", "account_id", "category_id", "type")
+
+
+def expected_rollup(user_id: Optional[UUID] = None):
+    day = func.date(
+        func.coalesce(Transactions.transaction_time, Transactions.created_at)
+    )
+    query = select(
+        Transactions.user_id,
+        day.label("day"),
+        Transactions.account_id,
+        Transactions.category_id,
+        Transactions.type,
+        func.sum(Transactions.amount).label("total"),
+        func.count().label("count"),
+    ).where(Transactions.is_deleted == False)
+    if user_id:
+        query = query.where(Transactions.user_id == user_id)
+    return query.group_by(
+        Transactions.user_id,
+        day,
+        Transactions.account_id,
+        Transactions.category_id,
+        Transactions.type,
+    )
+
+
+def rebuild(user_id: Optional[UUID] = None) -> int:
+    with Session(engine) as session:
+        # keeps transaction inserts from upserting rollup rows mid-rebuild
+        session.exec(text("LOCK TABLE dailyspending IN SHARE ROW EXCLUSIVE MODE"))
+        stale = delete(DailySpending)
+        if user_id:
+            stale = stale.where(DailySpending.user_id == user_id)
+        session.exec(stale)
+        result = session.exec(
+            pg_insert(DailySpending).from_select(
+                [*ROLLUP_KEY, "total", "count"], expected_rollup(user_id)
+            )
+        )
+        session.commit()
+        return result.rowcount
+
+
+def check(user_id: Optional[UUID] = None) -> list:
+    expected = expected_rollup(user_id).subquery("expected")
+    actual = select(DailySpending)
+    if user_id:
+        actual = actual.where(DailySpending.user_id == user_id)
+    actual = actual.subquery("actual")
+
+    expected_total = func.coalesce(expected.c.total, 0)
+    actual_total = func.coalesce(actual.c.total, 0)
+    query = (
+        select(
+            *(
+                func.coalesce(expected.c[key], actual.c[key]).label(key)
+                for key in ROLLUP_KEY
+            ),
+            expected_total.label("expected_total"),
+            actual_total.label("actual_total"),
+            func.coalesce(expected.c.count, 0).label("expected_count"),
+            func.coalesce(actual.c.count, 0).label("actual_count"),
+        )
+        .select_from(
+            expected.outerjoin(
+                actual,
+                and_(*(expected.c[key] == actual.c[key] for key in ROLLUP_KEY)),
+                full=True,
+            )
+        )
+        .where(
+            or_(
+                func.coalesce(expected.c.count, 0) != func.coalesce(actual.c.count, 0),
+                func.abs(expected_total - actual_total)
+                > literal_column("1e-6") * func.greatest(1, func.abs(expected_total)),
+            )
+        )
+    )
+    with Session(engine) as session:
+        return session.exec(query).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild or verify the daily spending rollup"
+    )
+    parser.add_argument("command", choices=("rebuild", "check"))
+    parser.add_argument("--user-id", type=UUID, default=None)
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        print(f"Rollup rebuilt with {rebuild(args.user_id)} rows")
+        return
+
+    mismatches = check(args.user_id)
+    for row in mismatches:
+        print(
+            f"{row.user_id} {row.day} account={row.account_id} "
+            f"category={row.category_id} type={row.type}: "
+            f"expected {row.expected_total} ({row.expected_count}), "
+            f"found {row.actual_total} ({row.actual_count})"
+        )
+    print(f"{len(mismatches)} mismatched rollup rows")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
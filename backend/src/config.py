@@ -1,13 +1,57 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     DB_URL: str
+    ASYNC_DB_URL: Optional[str] = None
     PORT: int
     ALGORITHM: str
     SECRET_KEY: str
     EXPIRE_MINUTES: str
 
+    REVOCATION_CACHE_SIZE: int = 10_000
+    REVOCATION_BLOOM_CAPACITY: int = 100_000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_RESYNC_SECONDS: int = 600
+    BLACKLIST_COMPACTION_CHUNK: int = 5_000
+    BUDGET_EXPIRY_CHUNK: int = 5_000
+    BUDGET_RECOMPUTE_BATCH: int = 500
+    BUDGET_RECOMPUTE_WORKERS: int = 4
+    BUDGET_FORECAST_LOOKBACK_DAYS: int = 30
+    BUDGET_ALERT_THRESHOLDS: str = "50,80,100"
+
+    JOB_RUNNER_IN_PROCESS: bool = True
+    JOB_POLL_SECONDS: float = 10
+    JOB_LEASE_SECONDS: int = 3_600
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_DELAY_SECONDS: int = 60
+    JOB_RUNS_RETENTION_DAYS: int = 30
+
+    PAGINATION_COUNT_CACHE_TTL: float = 0
+    PAGINATION_COUNT_CACHE_USERS: int = 10_000
+    PAGINATION_COUNT_CACHE_KEYS_PER_USER: int = 50
+    BUDGET_CACHE_TTL: float = 300
+    BUDGET_CACHE_USERS: int = 10_000
+
+    BULK_TRANSACTIONS_CHUNK_SIZE: int = 500
+    BULK_TRANSACTIONS_MAX_REPORTED_ERRORS: int = 1_000
+    BULK_TRANSACTIONS_MAX_LINE_BYTES: int = 65_536
+    EXPORT_TRANSACTIONS_BATCH_SIZE: int = 1_000
+    TRANSACTION_PARTITIONS_AHEAD: int = 3
+
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 86_400
+    IDEMPOTENCY_PURGE_CHUNK: int = 5_000
+
+    EVENT_QUEUE_SIZE: int = 10_000
+    EVENT_BATCH_SIZE: int = 200
+    EVENT_BATCH_WAIT_SECONDS: float = 0.05
+
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
     model_config = SettingsConfigDict(env_file=".env")
 
 
@@ -2,22 +2,23 @@ from typing import Generic, TypeVar
 from uuid import UUID
 
 from fastapi import status
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.models.models import Accounts
 from src.schemas.accounts_schema import AccountsInput, AccountsUpdate
 from src.utils.fetcher import Fetcher
+from src.utils.paginator import count_cache
 
 T = TypeVar("T")
 
 
 class AccountController(Generic[T]):
-    def __init__(self, db: Session, user_id: UUID):
+    def __init__(self, db: AsyncSession, user_id: UUID):
         self.db = db
         self.user_id = user_id
 
-    def get_account_exist(self, name):
-        get_accounts = Fetcher(
+    async def get_account_exist(self, name):
+        get_accounts = await Fetcher(
             database=self.db,
             table=Accounts,
             where=(
@@ -29,8 +30,8 @@ class AccountController(Generic[T]):
         ).get_exist()
         return get_accounts
 
-    def update_accounts(self, input_data: AccountsUpdate, account_id: UUID):
-        get_accounts = Fetcher(
+    async def update_accounts(self, input_data: AccountsUpdate, account_id: UUID):
+        get_accounts = await Fetcher(
             database=self.db,
             table=Accounts,
             where=(Accounts.id == account_id,),
@@ -38,17 +39,18 @@ class AccountController(Generic[T]):
         ).get_one()
         update_record = input_data.model_dump(exclude_none=True, exclude_unset=True)
         get_accounts.sqlmodel_update(update_record)
-        self.db.commit()
-        self.db.refresh(get_accounts)
+        await self.db.commit()
+        await self.db.refresh(get_accounts)
         return get_accounts
 
-    def add_accounts(self, input_data: AccountsInput):
-        self.get_account_exist(input_data.name)
+    async def add_accounts(self, input_data: AccountsInput):
+        await self.get_account_exist(input_data.name)
         account = Accounts(
             user_id=self.user_id,
             **input_data.model_dump(),
         )
         self.db.add(account)
-        self.db.commit()
-        self.db.refresh(account)
+        await self.db.commit()
+        await self.db.refresh(account)
+        count_cache.invalidate(self.user_id)
         return account
@@ -1,15 +1,19 @@
-from typing import Optional
+from typing import Optional, Tuple
 
 import jwt
 from fastapi import HTTPException, status
 from fastapi.openapi.models import HTTPBearer
-from passlib.context import CryptContext
-from sqlmodel import Session, SQLModel
-
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.middlewares.revocation_cache import (
+    publish_revocation,
+    revocation_cache,
+    token_digest,
+)
 from src.models.models import Blacklist, Users
 from src.utils.fetcher import Fetcher
-
-encrypt_configuration = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from src.utils.password_hasher import PasswordHasher
 
 from datetime import datetime, timedelta, timezone
 
@@ -17,6 +21,12 @@ from src.config import settings
 
 authenticationScheme = HTTPBearer()
 
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
 
 class TokenData(SQLModel):
     id: str
@@ -53,12 +63,14 @@ async def decode_access_token(token: str):
         )
 
 
-def hash_password(password: str) -> str:
-    return encrypt_configuration.hash(password)
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
 
 
-def compare_password(input_password: str, stored_password) -> bool:
-    return encrypt_configuration.verify(input_password, stored_password)
+async def compare_password(
+    input_password: str, stored_password
+) -> Tuple[bool, Optional[str]]:
+    return await password_hasher.verify_and_update(input_password, stored_password)
 
 
 class AuthControllerInput(SQLModel):
@@ -81,14 +93,14 @@ class AuthController:
         )
         return get_user
 
-    def signup(self):
-        get_user = self.get_user().get_value()
+    async def signup(self):
+        get_user = await self.get_user().get_value()
         if get_user:
             raise HTTPException(
                 status.HTTP_400_BAD_REQUEST,
                 "User is already registered",
             )
-        hashed_password = hash_password(self.input_data.password)
+        hashed_password = await hash_password(self.input_data.password)
         user = Users(
             name=self.input_data.name,
             email=self.input_data.email,
@@ -96,14 +108,14 @@ class AuthController:
         )
 
         self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        await self.db.commit()
+        await self.db.refresh(user)
 
         return user
 
-    def login(self):
-        get_user = self.get_user().get_one()
-        compared_password = compare_password(
+    async def login(self):
+        get_user = await self.get_user().get_one()
+        compared_password, rehashed_password = await compare_password(
             self.input_data.password, get_user.password
         )
         if not compared_password:
@@ -111,6 +123,11 @@ class AuthController:
                 status.HTTP_400_BAD_REQUEST,
                 "User is already registered",
             )
+        if rehashed_password:
+            get_user.password = rehashed_password
+            self.db.add(get_user)
+            await self.db.commit()
+            await self.db.refresh(get_user)
         create_token = create_access_token(
             TokenData(
                 id=str(get_user.id),
@@ -121,17 +138,24 @@ class AuthController:
         return create_token
 
 
-def logout(token, db: Session):
-    Fetcher(
+async def logout(token, db: AsyncSession):
+    digest = token_digest(token)
+    await Fetcher(
         database=db,
         table=Blacklist,
-        where=(Blacklist.token == token,),
+        where=(Blacklist.token_hash == digest,),
         error="Unauthorized access",
         status_code=status.HTTP_401_UNAUTHORIZED,
     ).get_exist()
 
-    add = Blacklist(token=token)
+    expires = jwt.decode(
+        token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+    ).get("exp", 0)
+
+    add = Blacklist(token_hash=digest, exp=expires)
     db.add(add)
-    db.commit()
+    await publish_revocation(db, digest, expires)
+    await db.commit()
+    revocation_cache.add(digest, expires)
 
     return {"message": "Logout successful"}
@@ -1,20 +1,240 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List
 from uuid import UUID
 
 from fastapi import status
-from sqlmodel import Session
+from sqlalchemy import (
+    Date,
+    and_,
+    cast,
+    func,
+    literal,
+    or_,
+    select,
+    text,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.models.models import Accounts, Budgets, BudgetStatusTypesEnum, BudgetTypesEnum
-from src.schemas.bugdet_schema import BudgetInput, BudgetUpdate
+from src.config import settings
+from src.database import get_session, pg_listener
+from src.models.models import (
+    Accounts,
+    BudgetAlerts,
+    Budgets,
+    BudgetStatusTypesEnum,
+    BudgetTypesEnum,
+    Notifications,
+    Transactions,
+    TransactionTypesEnum,
+)
+from src.routers.notification_router import manager
+from src.schemas.bugdet_schema import BudgetForecast, BudgetInput, BudgetUpdate
+from src.utils.budget_cache import ALL_USERS, BudgetCache, CachedBudget
+from src.utils.budget_forecast import forecast_budgets
+from src.utils.event_pipeline import EventPipeline
 from src.utils.fetcher import Fetcher
+from src.utils.paginator import count_cache
+
+BUDGETS_CHANNEL = "budgets_changed"
+
+budget_cache = BudgetCache(
+    ttl=settings.BUDGET_CACHE_TTL, max_users=settings.BUDGET_CACHE_USERS
+)
+
+pg_listener.subscribe(
+    BUDGETS_CHANNEL,
+    budget_cache.invalidate,
+    on_sync=budget_cache.resync,
+    on_lost=budget_cache.desync,
+)
+
+
+def budgets_changed(user_id=ALL_USERS):
+    # NOTIFY is transactional: every worker drops its cached budgets once the
+    # change commits. Delivery is asynchronous, so the writer also invalidates
+    # its own cache right after commit
+    return text("SELECT pg_notify(:channel, :payload)").bindparams(
+        channel=BUDGETS_CHANNEL, payload=str(user_id)
+    )
+
+
+async def active_budgets(db: AsyncSession, user_id: UUID) -> List[CachedBudget]:
+    budgets = budget_cache.get(user_id)
+    if budgets is not None:
+        return budgets
+
+    generation = budget_cache.generation
+    rows = await db.exec(
+        select(
+            Budgets.id,
+            Budgets.type,
+            Budgets.account_id,
+            Budgets.start_date,
+            Budgets.end_date,
+        ).where(
+            Budgets.status == BudgetStatusTypesEnum.ACTIVE,
+            Budgets.user_id == user_id,
+            Budgets.is_deleted == False,
+        )
+    )
+    budgets = [CachedBudget(*row) for row in rows]
+    budget_cache.set(user_id, budgets, generation)
+    return budgets
+
+
+@dataclass
+class TransactionCreated:
+    user_id: UUID
+    # budget rows as returned by the charging UPDATE, after the charge
+    budgets: list = field(default_factory=list)
+    account_names: Dict[UUID, str] = field(default_factory=dict)
+
+
+ALERT_THRESHOLDS = sorted(
+    int(threshold) for threshold in settings.BUDGET_ALERT_THRESHOLDS.split(",")
+)
+
+
+def crossed_thresholds(budget) -> List[int]:
+    if budget.limit <= 0:
+        return ALERT_THRESHOLDS if budget.amount > 0 else []
+    used = budget.amount * 100 / budget.limit
+    return [threshold for threshold in ALERT_THRESHOLDS if used >= threshold]
+
+
+def budget_alert_message(budget, threshold: int, account_names: Dict[UUID, str]):
+    if budget.type == BudgetTypesEnum.OVERALL:
+        name = "overall budget"
+    else:
+        name = f"account {account_names.get(budget.account_id)}"
+    if threshold >= 100:
+        return f"Budget limit exceeded for {name}"
+    return f"{threshold}% of the budget used for {name}"
+
+
+async def deliver_budget_alerts(events: List[TransactionCreated]):
+    # each threshold fires once per budget period: the state table's key
+    # decides, so racing batches and workers can't alert twice
+    candidates, budgets = set(), {}
+    for event in events:
+        for budget in event.budgets:
+            period_start = budget.start_date or datetime.min
+            for threshold in crossed_thresholds(budget):
+                candidates.add((budget.id, period_start, threshold))
+            budgets[budget.id] = (event, budget)
+    if not candidates:
+        return
+
+    async with get_session() as db:
+        fired = await db.exec(
+            pg_insert(BudgetAlerts)
+            .values(
+                [
+                    {
+                        "budget_id": budget_id,
+                        "period_start": start,
+                        "threshold": threshold,
+                    }
+                    for budget_id, start, threshold in sorted(candidates)
+                ]
+            )
+            .on_conflict_do_nothing()
+            .returning(BudgetAlerts.budget_id, BudgetAlerts.threshold)
+        )
+        # a jump past several thresholds reports only the highest
+        highest = {}
+        for budget_id, threshold in fired:
+            highest[budget_id] = max(threshold, highest.get(budget_id, threshold))
+
+        notifications = []
+        for budget_id, threshold in highest.items():
+            event, budget = budgets[budget_id]
+            notifications.append(
+                Notifications(
+                    user_id=event.user_id,
+                    message=budget_alert_message(
+                        budget, threshold, event.account_names
+                    ),
+                )
+            )
+        db.add_all(notifications)
+        await db.commit()
+
+    users = {notification.user_id for notification in notifications}
+    for user_id in users:
+        count_cache.invalidate(user_id)
+
+    await asyncio.gather(
+        *(
+            manager.send_personal_message(user_id=str(user_id), message="transaction")
+            for user_id in users
+        ),
+        return_exceptions=True,
+    )
+
+
+budget_alerts = EventPipeline(
+    "budget_alerts",
+    deliver_budget_alerts,
+    max_size=settings.EVENT_QUEUE_SIZE,
+    batch_size=settings.EVENT_BATCH_SIZE,
+    max_wait=settings.EVENT_BATCH_WAIT_SECONDS,
+)
+
+
+def budget_expenses(*scope):
+    # expenses inside a budget's window
+    return and_(
+        Transactions.user_id == Budgets.user_id,
+        Transactions.type == TransactionTypesEnum.EXPENSE,
+        Transactions.is_deleted == False,
+        Transactions.transaction_time >= Budgets.start_date,
+        Transactions.transaction_time <= Budgets.end_date,
+        *scope,
+    )
+
+
+def lock_budgets(*where):
+    # run before recompute_spend in the same transaction: waiting here for
+    # in-flight charges lets the UPDATE start from a snapshot that has them,
+    # instead of overwriting them with a stale sum
+    return select(Budgets.id).where(*where).order_by(Budgets.id).with_for_update()
+
+
+def recompute_spend(*where):
+    # one correlated aggregate per budget
+    spent = (
+        select(func.coalesce(func.sum(Transactions.amount), 0.0))
+        .where(
+            budget_expenses(
+                or_(
+                    Budgets.type == BudgetTypesEnum.OVERALL,
+                    Transactions.account_id == Budgets.account_id,
+                )
+            )
+        )
+        .scalar_subquery()
+    )
+    return (
+        update(Budgets)
+        .where(*where)
+        .values(amount=spent)
+        .execution_options(synchronize_session=False)
+    )
 
 
 class BudgetController:
-    def __init__(self, user: UUID, database: Session):
+    def __init__(self, user: UUID, database: AsyncSession):
         self.user = user
         self.database = database
 
-    def get_budgets(self, account_id: UUID):
-        budget = Fetcher(
+    async def get_budgets(self, account_id: UUID):
+        budget = await Fetcher(
             database=self.database,
             table=Budgets,
             where=(
@@ -28,30 +248,35 @@ class BudgetController:
         ).get_exist()
         return budget
 
-    def add_new_budget(self, input_data: BudgetInput, account_id: UUID):
-        Fetcher(
+    async def add_new_budget(self, input_data: BudgetInput, account_id: UUID):
+        await Fetcher(
             database=self.database,
             table=Accounts,
             where=(Accounts.id == account_id,),
             error="Account doesn't exist",
         ).get_one()
 
-        self.get_budgets(account_id)
+        await self.get_budgets(account_id)
 
         budget = Budgets(
             **input_data.model_dump(),
             user_id=self.user,
             type=BudgetTypesEnum.ACCOUNT,
-            account_id=account_id
+            account_id=account_id,
         )
         self.database.add(budget)
-        self.database.commit()
-        self.database.refresh(budget)
+        await self.database.flush()
+        await self.database.exec(recompute_spend(Budgets.id == budget.id))
+        await self.database.exec(budgets_changed(self.user))
+        await self.database.commit()
+        budget_cache.invalidate(self.user)
+        await self.database.refresh(budget)
+        count_cache.invalidate(self.user)
 
         return budget
 
-    def add_new_overall_budget(self, input_data: BudgetInput):
-        Fetcher(
+    async def add_new_overall_budget(self, input_data: BudgetInput):
+        await Fetcher(
             database=self.database,
             table=Budgets,
             where=(
@@ -68,24 +293,108 @@ class BudgetController:
         )
 
         self.database.add(budget)
-        self.database.commit()
-        self.database.refresh(budget)
+        await self.database.flush()
+        await self.database.exec(recompute_spend(Budgets.id == budget.id))
+        await self.database.exec(budgets_changed(self.user))
+        await self.database.commit()
+        budget_cache.invalidate(self.user)
+        await self.database.refresh(budget)
+        count_cache.invalidate(self.user)
 
         return budget
 
-    def update_budget(self, input_data: BudgetUpdate, budget_id: UUID):
-        budget = Fetcher(
+    async def update_budget(self, input_data: BudgetUpdate, budget_id: UUID):
+        budget = await Fetcher(
             database=self.database,
             table=Budgets,
-            where=(Budgets.id == budget_id,),
+            where=(Budgets.id == budget_id, Budgets.user_id == self.user),
             error="Budget not found",
             status_code=status.HTTP_401_UNAUTHORIZED,
         ).get_one()
 
         update_record = input_data.model_dump(exclude_none=True, exclude_unset=True)
         budget.sqlmodel_update(update_record)
+        if {"start_date", "end_date"} & update_record.keys():
+            await self.database.flush()
+            await self.database.exec(lock_budgets(Budgets.id == budget.id))
+            await self.database.exec(recompute_spend(Budgets.id == budget.id))
+        await self.database.exec(budgets_changed(budget.user_id))
 
-        self.database.commit()
-        self.database.refresh(budget)
+        await self.database.commit()
+        budget_cache.invalidate(budget.user_id)
+        await self.database.refresh(budget)
 
         return budget
+
+    async def forecast(self) -> List[BudgetForecast]:
+        # one aggregate builds the daily spend series of every active budget;
+        # budgets without spend come back once with a null age. Account budgets
+        # get their own branch so they can hash join on the account
+        now = datetime.now()
+        age = literal(now.date(), Date) - cast(Transactions.transaction_time, Date)
+
+        def spend_series(type: BudgetTypesEnum, *scope):
+            return (
+                select(
+                    Budgets.id,
+                    Budgets.type,
+                    Budgets.account_id,
+                    Budgets.start_date,
+                    Budgets.end_date,
+                    Budgets.limit,
+                    age.label("age"),
+                    func.sum(Transactions.amount).label("amount"),
+                )
+                .outerjoin(Transactions, budget_expenses(*scope))
+                .where(
+                    Budgets.user_id == self.user,
+                    Budgets.type == type,
+                    Budgets.status == BudgetStatusTypesEnum.ACTIVE,
+                    Budgets.is_deleted == False,
+                    Budgets.start_date != None,
+                    Budgets.end_date != None,
+                )
+                .group_by(Budgets.id, age)
+            )
+
+        rows = await self.database.exec(
+            union_all(
+                spend_series(BudgetTypesEnum.OVERALL),
+                spend_series(
+                    BudgetTypesEnum.ACCOUNT,
+                    Transactions.account_id == Budgets.account_id,
+                ),
+            )
+        )
+
+        budgets, spend = {}, ([], [], [])
+        for row in rows:
+            index = budgets.setdefault(row.id, (len(budgets), row))[0]
+            if row.age is not None:
+                spend[0].append(index)
+                spend[1].append(row.age)
+                spend[2].append(row.amount)
+
+        budget_rows = [row for _, row in budgets.values()]
+        forecasts = forecast_budgets(
+            starts=[row.start_date for row in budget_rows],
+            ends=[row.end_date for row in budget_rows],
+            limits=[row.limit for row in budget_rows],
+            spend_budget=spend[0],
+            spend_age=spend[1],
+            spend_amount=spend[2],
+            now=now,
+            lookback_days=settings.BUDGET_FORECAST_LOOKBACK_DAYS,
+        )
+        return [
+            BudgetForecast(
+                budget_id=row.id,
+                type=row.type,
+                account_id=row.account_id,
+                start_date=row.start_date,
+                end_date=row.end_date,
+                limit=row.limit,
+                **forecast,
+            )
+            for row, forecast in zip(budget_rows, forecasts)
+        ]
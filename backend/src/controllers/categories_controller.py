@@ -1,7 +1,7 @@
 from uuid import UUID
 
 from fastapi import status
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.models.models import Categories, SubCategories
 from src.schemas.categories_schema import (
@@ -10,15 +10,16 @@ from src.schemas.categories_schema import (
     SubCategoryUpdate,
 )
 from src.utils.fetcher import Fetcher
+from src.utils.paginator import count_cache
 
 
 class CategoryController:
-    def __init__(self, database: Session, user: UUID) -> None:
+    def __init__(self, database: AsyncSession, user: UUID) -> None:
         self.database = database
         self.user = user
 
-    def get_controller(self, name):
-        get_accounts = Fetcher(
+    async def get_controller(self, name):
+        get_accounts = await Fetcher(
             database=self.database,
             table=Categories,
             where=(Categories.name == name,),
@@ -28,20 +29,21 @@ class CategoryController:
 
         return get_accounts
 
-    def add_category(self, input_data: CategoryInput):
-        self.get_controller(input_data.name)
+    async def add_category(self, input_data: CategoryInput):
+        await self.get_controller(input_data.name)
         category = Categories(
             user_id=self.user,
             name=input_data.name,
             description=input_data.description,
         )
         self.database.add(category)
-        self.database.commit()
-        self.database.refresh(category)
+        await self.database.commit()
+        await self.database.refresh(category)
+        count_cache.invalidate(self.user)
         return category
 
-    def update_category(self, input_data: CategoryInput, category_id: UUID):
-        get_category = Fetcher(
+    async def update_category(self, input_data: CategoryInput, category_id: UUID):
+        get_category = await Fetcher(
             database=self.database,
             table=Categories,
             where=(Categories.id == category_id,),
@@ -49,18 +51,18 @@ class CategoryController:
         ).get_one()
         update_record = input_data.model_dump(exclude_none=True, exclude_unset=True)
         get_category.sqlmodel_update(update_record)
-        self.database.commit()
-        self.database.refresh(get_category)
+        await self.database.commit()
+        await self.database.refresh(get_category)
         return get_category
 
 
 class SubCategoryController:
-    def __init__(self, database: Session, user: UUID) -> None:
+    def __init__(self, database: AsyncSession, user: UUID) -> None:
         self.database = database
         self.user = user
 
-    def get_controller(self, name):
-        get_accounts = Fetcher(
+    async def get_controller(self, name):
+        get_accounts = await Fetcher(
             database=self.database,
             table=SubCategories,
             where=(SubCategories.name == name,),
@@ -69,8 +71,8 @@ class SubCategoryController:
 
         return get_accounts
 
-    def add_sub_category(self, input_data: SubCategoryInput):
-        self.get_controller(input_data.name)
+    async def add_sub_category(self, input_data: SubCategoryInput):
+        await self.get_controller(input_data.name)
         category = SubCategories(
             category_id=input_data.category_id,
             user_id=self.user,
@@ -78,12 +80,15 @@ class SubCategoryController:
             description=input_data.description,
         )
         self.database.add(category)
-        self.database.commit()
-        self.database.refresh(category)
+        await self.database.commit()
+        await self.database.refresh(category)
+        count_cache.invalidate(self.user)
         return category
 
-    def update_category(self, input_data: SubCategoryUpdate, sub_category_id: UUID):
-        get_category = Fetcher(
+    async def update_category(
+        self, input_data: SubCategoryUpdate, sub_category_id: UUID
+    ):
+        get_category = await Fetcher(
             database=self.database,
             table=SubCategories,
             where=(SubCategories.id == sub_category_id,),
@@ -92,6 +97,6 @@ class SubCategoryController:
 
         update_record = input_data.model_dump(exclude_none=True, exclude_unset=True)
         get_category.sqlmodel_update(update_record)
-        self.database.commit()
-        self.database.refresh(get_category)
+        await self.database.commit()
+        await self.database.refresh(get_category)
         return get_category
@@ -1,104 +1,513 @@
+from collections import defaultdict
 from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 from uuid import UUID
 
-from sqlmodel import Session
+from fastapi import status
+from pydantic import ValidationError
+from sqlalchemy import DateTime, case, cast, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.config import settings
+from src.controllers.budget_controller import (
+    TransactionCreated,
+    active_budgets,
+    budget_alerts,
+)
+from src.database import get_session
 from src.models.models import (
     Accounts,
     Budgets,
     BudgetStatusTypesEnum,
     BudgetTypesEnum,
     Categories,
-    Notifications,
+    DailySpending,
     SubCategories,
     Transactions,
     TransactionTypesEnum,
 )
-from src.routers.notification_router import manager
-from src.schemas.transactions_schema import TransactionsInput
-from src.utils.fetcher import Fetcher
+from src.schemas.common_schema import ResponseSchema
+from src.schemas.transactions_schema import (
+    BulkTransactionError,
+    BulkTransactionsResult,
+    ReportGroupEnum,
+    ReportIntervalEnum,
+    TransactionFilters,
+    TransactionsInput,
+    TransactionsResponse,
+)
+from src.utils.budget_cache import CachedBudget
+from src.utils.fetcher import Fetcher, MultiFetcher
+from src.utils.idempotency import store_idempotent_response
+from src.utils.paginator import count_cache
 
 
-async def add_new_transaction(
-    db: Session, transaction: TransactionsInput, user_id: UUID
+def balance_delta(transaction: TransactionsInput) -> float:
+    if transaction.type == TransactionTypesEnum.INCOME:
+        return transaction.amount
+    return -transaction.amount
+
+
+async def apply_balance_deltas(
+    db: AsyncSession, deltas: Dict[UUID, float]
+) -> Dict[UUID, str]:
+    if not deltas:
+        return {}
+    accounts = await db.exec(
+        update(Accounts)
+        .where(Accounts.id.in_(deltas))
+        .values(balance=Accounts.balance + case(deltas, value=Accounts.id, else_=0.0))
+        .returning(Accounts.id, Accounts.name)
+        .execution_options(synchronize_session=False)
+    )
+    return {account.id: account.name for account in accounts}
+
+
+def add_budget_charges(
+    charges: Dict[UUID, float], budgets: List[CachedBudget], transaction: Transactions
 ):
-    if transaction.sub_category_id:
-        Fetcher(
-            database=db,
-            table=SubCategories,
-            where=(SubCategories.id == transaction.sub_category_id,),
-            error="Subcategory not found",
-        ).get_one()
-
-    Fetcher(
-        database=db,
-        table=Categories,
-        where=(Categories.id == transaction.category_id,),
-        error="Category not found",
-    ).get_one()
-
-    account = Fetcher(
-        database=db,
-        table=Accounts,
-        where=(Accounts.id == transaction.account_id,),
-        error="Account not found",
-    ).get_one()
-
-    budget_overall = Fetcher(
-        database=db,
-        table=Budgets,
-        where=(
+    # an expense counts against every active budget whose window holds it:
+    # the overall budget and its own account's budget
+    for budget in budgets:
+        if budget.covers(transaction.transaction_time) and (
+            budget.type == BudgetTypesEnum.OVERALL
+            or budget.account_id == transaction.account_id
+        ):
+            charges[budget.id] += transaction.amount
+
+
+async def charge_budgets(db: AsyncSession, charges: Dict[UUID, float]):
+    # one UPDATE adds every budget's share, returning the charged budgets; the
+    # cached budget list picks the rows, so users without a budget skip it
+    if not charges:
+        return []
+    budgets = await db.exec(
+        update(Budgets)
+        .where(
+            Budgets.id.in_(charges),
             Budgets.status == BudgetStatusTypesEnum.ACTIVE,
-            Budgets.user_id == user_id,
-            Budgets.type == BudgetTypesEnum.OVERALL,
+            Budgets.is_deleted == False,
+        )
+        .values(
+            amount=func.coalesce(Budgets.amount, 0)
+            + case(charges, value=Budgets.id, else_=0.0)
+        )
+        .returning(
+            Budgets.id,
+            Budgets.type,
+            Budgets.account_id,
+            Budgets.amount,
+            Budgets.limit,
+            Budgets.start_date,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return budgets.all()
+
+
+def filter_clauses(filters: TransactionFilters, table=Transactions) -> tuple:
+    clauses = (table.user_id == filters.user_id,)
+    if filters.type:
+        clauses += (table.type == filters.type,)
+    if filters.categories:
+        clauses += (table.category_id.in_(filters.categories),)
+    if filters.accounts:
+        clauses += (table.account_id.in_(filters.accounts),)
+    if table is Transactions:
+        clauses += (Transactions.is_deleted == False,)
+        if filters.start_date:
+            clauses += (Transactions.transaction_time >= filters.start_date,)
+        if filters.end_date:
+            clauses += (Transactions.transaction_time <= filters.end_date,)
+    return clauses
+
+
+def rollup_key(transaction: Transactions) -> tuple:
+    return (
+        transaction.transaction_time.date(),
+        transaction.account_id,
+        transaction.category_id,
+        transaction.type,
+    )
+
+
+async def apply_rollup_deltas(
+    db: AsyncSession, user_id: UUID, totals: Dict[tuple, List[float]]
+):
+    # keys are sorted so concurrent writers lock rollup rows in the same order
+    if not totals:
+        return
+    statement = pg_insert(DailySpending).values(
+        [
+            dict(
+                user_id=user_id,
+                day=day,
+                account_id=account_id,
+                category_id=category_id,
+                type=type,
+                total=total,
+                count=count,
+            )
+            for (day, account_id, category_id, type), (total, count) in sorted(
+                totals.items()
+            )
+        ]
+    )
+    await db.exec(
+        statement.on_conflict_do_update(
+            index_elements=DailySpending.__table__.primary_key.columns,
+            set_={
+                "total": DailySpending.total + statement.excluded.total,
+                "count": DailySpending.count + statement.excluded.count,
+            },
+        )
+    )
+
+
+EXPORT_COLUMNS = (
+    Transactions.id,
+    Transactions.transaction_time,
+    Transactions.created_at,
+    Transactions.type,
+    Transactions.amount,
+    Transactions.description,
+    Transactions.account_id,
+    Accounts.name.label("account"),
+    Transactions.category_id,
+    Categories.name.label("category"),
+    Transactions.sub_category_id,
+    SubCategories.name.label("sub_category"),
+)
+
+
+async def export_transactions(filters: TransactionFilters) -> AsyncIterator[dict]:
+    # runs after the request's own session is closed, so it owns one; rows are
+    # pulled through a server-side cursor in batches instead of loaded at once
+    query = (
+        select(*EXPORT_COLUMNS)
+        .join(Accounts, Accounts.id == Transactions.account_id)
+        .join(Categories, Categories.id == Transactions.category_id)
+        .outerjoin(SubCategories, SubCategories.id == Transactions.sub_category_id)
+        .where(*filter_clauses(filters))
+        .order_by(Transactions.transaction_time.desc(), Transactions.id.desc())
+        .execution_options(yield_per=settings.EXPORT_TRANSACTIONS_BATCH_SIZE)
+    )
+    async with get_session() as session:
+        result = await session.stream(query)
+        async for row in result.mappings():
+            yield dict(row)
+
+
+ROLLUP_GROUPS = {
+    ReportGroupEnum.TYPE,
+    ReportGroupEnum.ACCOUNT,
+    ReportGroupEnum.CATEGORY,
+}
+
+
+def report_groups(table):
+    groups = {
+        ReportGroupEnum.TYPE: ((table.type,), None),
+        ReportGroupEnum.ACCOUNT: (
+            (table.account_id, Accounts.name.label("account")),
+            (Accounts, Accounts.id == table.account_id),
         ),
-    ).get_value()
-    budget_account = Fetcher(
-        database=db,
-        table=Budgets,
-        where=(
-            Budgets.status == BudgetStatusTypesEnum.ACTIVE,
-            Budgets.user_id == user_id,
-            Budgets.type == BudgetTypesEnum.ACCOUNT,
-            Budgets.account_id == account.id,
+        ReportGroupEnum.CATEGORY: (
+            (table.category_id, Categories.name.label("category")),
+            (Categories, Categories.id == table.category_id),
         ),
-    ).get_value()
-
-    if budget_overall and TransactionTypesEnum.EXPENSE == transaction.type:
-        budget_overall.amount += transaction.amount
-        if budget_overall.amount > budget_overall.limit:
-            await manager.send_personal_message(user_id=user_id, message="transaction")
-            db.add(
-                Notifications(
-                    user_id=user_id, message="Budget limit exceeded for overall budget"
-                )
-            )
+    }
+    if table is Transactions:
+        groups[ReportGroupEnum.SUB_CATEGORY] = (
+            (Transactions.sub_category_id, SubCategories.name.label("sub_category")),
+            (SubCategories, SubCategories.id == Transactions.sub_category_id),
+        )
+    return groups
 
-    if budget_account and TransactionTypesEnum.EXPENSE == transaction.type:
-        print(budget_account)
-        budget_account.amount += transaction.amount
-        if budget_account.amount > budget_account.limit:
-            await manager.send_personal_message(user_id=user_id, message="transaction")
-            db.add(
-                Notifications(
-                    user_id=user_id,
-                    message=f"Budget limit exceeded for account {account.name}",
-                )
-            )
 
-    if transaction.type == TransactionTypesEnum.INCOME:
-        account.balance += transaction.amount
+async def transactions_report(
+    db: AsyncSession,
+    filters: TransactionFilters,
+    group_by: List[ReportGroupEnum],
+    interval: Optional[ReportIntervalEnum] = None,
+):
+    # the daily rollup answers anything that needs neither sub-categories nor
+    # a time range narrower than the whole history
+    use_rollup = (
+        not filters.start_date
+        and not filters.end_date
+        and set(group_by) <= ROLLUP_GROUPS
+    )
+    if use_rollup:
+        table, time, amount, count = (
+            DailySpending,
+            cast(DailySpending.day, DateTime),
+            DailySpending.total,
+            func.sum(DailySpending.count),
+        )
     else:
-        account.balance -= transaction.amount
+        table, time, amount, count = (
+            Transactions,
+            Transactions.transaction_time,
+            Transactions.amount,
+            func.count(),
+        )
+
+    columns, joins = (), ()
+    if interval:
+        columns += (func.date_trunc(interval.value, time).label("period"),)
+    groups = report_groups(table)
+    for group in dict.fromkeys(group_by):
+        group_columns, join = groups[group]
+        columns += group_columns
+        joins += (join,) if join else ()
+
+    income, expense = (
+        func.coalesce(func.sum(amount).filter(table.type == kind.value), 0)
+        for kind in (TransactionTypesEnum.INCOME, TransactionTypesEnum.EXPENSE)
+    )
+    query = select(
+        *columns,
+        income.label("income"),
+        expense.label("expense"),
+        count.label("count"),
+    )
+    query = query.select_from(table)
+    for join in joins:
+        query = query.outerjoin(*join)
+    query = (
+        query.where(*filter_clauses(filters, table))
+        .group_by(*columns)
+        .order_by(*columns[:1] if interval else (), expense.desc(), income.desc())
+    )
+    return (await db.exec(query)).mappings().all()
+
+
+def transaction_created_response(transaction: Transactions) -> ResponseSchema:
+    return ResponseSchema(
+        message="Transaction added successfully",
+        data=TransactionsResponse(**transaction.model_dump()),
+    )
+
+
+async def add_new_transaction(
+    db: AsyncSession,
+    transaction: TransactionsInput,
+    user_id: UUID,
+    idempotency_key: Optional[str] = None,
+):
+    lookups = {
+        "category": Fetcher(
+            database=db,
+            table=Categories,
+            where=(
+                Categories.id == transaction.category_id,
+                Categories.user_id == user_id,
+            ),
+            error="Category not found",
+        ),
+        "account": Fetcher(
+            database=db,
+            table=Accounts,
+            where=(
+                Accounts.id == transaction.account_id,
+                Accounts.user_id == user_id,
+            ),
+            error="Account not found",
+        ),
+    }
+    if transaction.sub_category_id:
+        lookups["sub_category"] = Fetcher(
+            database=db,
+            table=SubCategories,
+            where=(
+                SubCategories.id == transaction.sub_category_id,
+                SubCategories.user_id == user_id,
+            ),
+            error="Subcategory not found",
+        )
+    await MultiFetcher(database=db, fetchers=lookups).get_ids()
 
     new_transaction = Transactions(
         user_id=user_id,
-        **transaction.model_dump(),
-        transaction_time=datetime.now(),
+        **transaction.model_dump(exclude={"transaction_time"}),
+        transaction_time=transaction.transaction_time or datetime.now(),
+    )
+
+    account_names = await apply_balance_deltas(
+        db, {transaction.account_id: balance_delta(transaction)}
+    )
+
+    charges = defaultdict(float)
+    if transaction.type == TransactionTypesEnum.EXPENSE:
+        add_budget_charges(charges, await active_budgets(db, user_id), new_transaction)
+    charged_budgets = await charge_budgets(db, charges)
+    await apply_rollup_deltas(
+        db, user_id, {rollup_key(new_transaction): [new_transaction.amount, 1]}
     )
 
     db.add(new_transaction)
-    db.commit()
-    db.refresh(new_transaction)
+    if idempotency_key:
+        await store_idempotent_response(
+            db,
+            user_id,
+            idempotency_key,
+            status.HTTP_200_OK,
+            transaction_created_response(new_transaction),
+        )
+    await db.commit()
+    await db.refresh(new_transaction)
+    count_cache.invalidate(user_id)
+
+    budget_alerts.publish(TransactionCreated(user_id, charged_budgets, account_names))
 
     return new_transaction
+
+
+# asyncpg binds at most 32767 parameters per statement, and the multi-row
+# INSERT takes one per column per row
+MAX_BIND_PARAMS = 32_767
+BULK_CHUNK_SIZE = min(
+    settings.BULK_TRANSACTIONS_CHUNK_SIZE,
+    MAX_BIND_PARAMS // len(Transactions.__table__.columns),
+)
+
+
+class BulkTransactionController:
+    def __init__(self, db: AsyncSession, user_id: UUID) -> None:
+        self.db = db
+        self.user_id = UUID(str(user_id))
+        self.result = BulkTransactionsResult()
+
+    def fail(self, row: int, error: str):
+        self.result.failed += 1
+        if len(self.result.errors) < settings.BULK_TRANSACTIONS_MAX_REPORTED_ERRORS:
+            self.result.errors.append(BulkTransactionError(row=row, error=error))
+        else:
+            self.result.errors_truncated = True
+
+    def validate(self, chunk: List[Tuple[int, Union[dict, Exception]]]):
+        valid = []
+        for row, record in chunk:
+            if isinstance(record, Exception):
+                self.fail(row, str(record))
+                continue
+            try:
+                valid.append((row, TransactionsInput.model_validate(record)))
+            except ValidationError as e:
+                self.fail(
+                    row,
+                    "; ".join(
+                        f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                        for error in e.errors()
+                    ),
+                )
+        return valid
+
+    async def lookup(self, transactions: List[TransactionsInput]):
+        def ids(field):
+            return {getattr(t, field) for t in transactions if getattr(t, field)}
+
+        return await MultiFetcher(
+            database=self.db,
+            fetchers={
+                "category": Fetcher(
+                    database=self.db,
+                    table=Categories,
+                    where=(
+                        Categories.id.in_(ids("category_id")),
+                        Categories.user_id == self.user_id,
+                    ),
+                ),
+                "account": Fetcher(
+                    database=self.db,
+                    table=Accounts,
+                    where=(
+                        Accounts.id.in_(ids("account_id")),
+                        Accounts.user_id == self.user_id,
+                    ),
+                ),
+                "sub_category": Fetcher(
+                    database=self.db,
+                    table=SubCategories,
+                    where=(
+                        SubCategories.id.in_(ids("sub_category_id")),
+                        SubCategories.user_id == self.user_id,
+                    ),
+                ),
+            },
+        ).get_id_sets()
+
+    async def insert_chunk(self, chunk: List[Tuple[int, Union[dict, Exception]]]):
+        valid = self.validate(chunk)
+        if not valid:
+            return
+        found = await self.lookup([transaction for _, transaction in valid])
+
+        budgets = []
+        if any(t.type == TransactionTypesEnum.EXPENSE for _, t in valid):
+            budgets = await active_budgets(self.db, self.user_id)
+
+        rows = []
+        balance_deltas: Dict[UUID, float] = defaultdict(float)
+        charges: Dict[UUID, float] = defaultdict(float)
+        rollup: Dict[tuple, List[float]] = defaultdict(lambda: [0.0, 0])
+        for row, transaction in valid:
+            if transaction.category_id not in found["category"]:
+                self.fail(row, "Category not found")
+            elif transaction.account_id not in found["account"]:
+                self.fail(row, "Account not found")
+            elif (
+                transaction.sub_category_id
+                and transaction.sub_category_id not in found["sub_category"]
+            ):
+                self.fail(row, "Subcategory not found")
+            else:
+                new_transaction = Transactions(
+                    user_id=self.user_id,
+                    **transaction.model_dump(exclude={"transaction_time"}),
+                    transaction_time=transaction.transaction_time or datetime.now(),
+                )
+                rows.append(new_transaction.model_dump())
+                totals = rollup[rollup_key(new_transaction)]
+                totals[0] += new_transaction.amount
+                totals[1] += 1
+                balance_deltas[transaction.account_id] += balance_delta(transaction)
+                if transaction.type == TransactionTypesEnum.EXPENSE:
+                    add_budget_charges(charges, budgets, new_transaction)
+
+        if not rows:
+            await self.db.commit()
+            return
+        await self.db.exec(insert(Transactions).values(rows))
+        account_names = await apply_balance_deltas(self.db, balance_deltas)
+        charged_budgets = await charge_budgets(self.db, charges)
+        await apply_rollup_deltas(self.db, self.user_id, rollup)
+
+        await self.db.commit()
+        self.result.created += len(rows)
+        count_cache.invalidate(self.user_id)
+
+        budget_alerts.publish(
+            TransactionCreated(self.user_id, charged_budgets, account_names)
+        )
+
+    async def add_transactions(
+        self, records: AsyncIterator[Tuple[int, Union[dict, Exception]]]
+    ) -> BulkTransactionsResult:
+        # every chunk commits on its own, so no transaction stays open (nor
+        # holds balance, budget and rollup row locks) while a slow client
+        # streams the next one. If the upload breaks off, the chunks that
+        # already committed are kept.
+        await self.db.commit()  # ends the read auth may have started
+        chunk = []
+        async for record in records:
+            chunk.append(record)
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                await self.insert_chunk(chunk)
+                chunk = []
+        if chunk:
+            await self.insert_chunk(chunk)
+
+        return self.result
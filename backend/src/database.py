@@ -1,16 +1,37 @@
 from typing import Annotated
 
 from fastapi import Depends
-from sqlmodel import Session, create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.config import settings
+from src.utils.pg_listener import PgListener
 
 engine = create_engine(settings.DB_URL, echo=False, pool_size=20, max_overflow=50)
 
+async_engine = create_async_engine(
+    settings.ASYNC_DB_URL
+    or make_url(settings.DB_URL).set(drivername="postgresql+asyncpg"),
+    echo=False,
+    pool_size=20,
+    max_overflow=50,
+)
 
-def getdb():
-    with Session(engine) as session:
+pg_listener = PgListener(engine, resync_seconds=settings.REVOCATION_RESYNC_SECONDS)
+
+
+def get_session() -> AsyncSession:
+    return AsyncSession(async_engine, expire_on_commit=False)
+
+
+async def getdb():
+    # cached per request, so auth and the handler share one session; it only
+    # checks out a connection on its first query and returns it once the
+    # response has been built
+    async with get_session() as session:
         yield session
 
 
-database = Annotated[Session, Depends(getdb)]
+database = Annotated[AsyncSession, Depends(getdb)]
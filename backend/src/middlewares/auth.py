@@ -1,10 +1,10 @@
 import jwt
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlmodel import Session
 
 from src.config import settings
-from src.database import engine
+from src.database import database
+from src.middlewares.revocation_cache import revocation_cache, token_digest
 from src.models.models import Blacklist
 from src.utils.fetcher import Fetcher
 
@@ -13,6 +13,7 @@ BearerToken = HTTPBearer()
 
 async def auth(
     request: Request,
+    db: database,
     credentials: HTTPAuthorizationCredentials = Depends(BearerToken),
 ):
     request.session.clear()
@@ -34,14 +35,23 @@ async def auth(
             detail=f"JWT ERROR: {str(e)}",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    with Session(engine) as session:
-        Fetcher(
-            database=session,
-            table=Blacklist,
-            where=(Blacklist.token == token,),
-            error="Unauthorized access",
-            status_code=status.HTTP_401_UNAUTHORIZED,
-        ).get_exist()
+
+    digest = token_digest(token)
+    revoked = revocation_cache.is_revoked(digest)
+    if revoked is None:
+        revoked = (
+            await Fetcher(
+                database=db,
+                table=Blacklist,
+                where=(Blacklist.token_hash == digest,),
+            ).get_value()
+            is not None
+        )
+        if revoked:
+            revocation_cache.add(digest, users_data.get("exp", 0))
+
+    if revoked:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Unauthorized access")
 
     request.session["user"] = users_data
     yield users_data
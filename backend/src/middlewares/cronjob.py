@@ -1,38 +1,185 @@
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Tuple
+from uuid import UUID
 
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-from sqlmodel import Session, select
+from sqlalchemy import tuple_
+from sqlmodel import Session, delete, select, update
 
+from src.config import settings
+from src.controllers.budget_controller import (
+    budgets_changed,
+    lock_budgets,
+    recompute_spend,
+)
 from src.database import engine
-from src.models.models import Budgets, BudgetStatusTypesEnum
+from src.models.models import (
+    Blacklist,
+    Budgets,
+    BudgetStatusTypesEnum,
+    IdempotencyKeys,
+    JobRuns,
+)
+from src.utils.job_runner import JobDefinition, JobRunner
+from src.utils.partitions import ensure_partitions
 
 
-def change_expired_budgets_status():
+def change_expired_budgets_status(
+    chunk_size: int = settings.BUDGET_EXPIRY_CHUNK,
+) -> Tuple[int, float]:
+    started = time.monotonic()
+    expired_count = 0
     with Session(engine) as session:
-        get_all_expired_budget = session.exec(
-            select(Budgets)
-            .where(Budgets.ending_date <= datetime.now())
-            .where(Budgets.is_deleted == False)
+        while True:
+            now = datetime.now()
+            expired = (
+                select(Budgets.id)
+                .where(
+                    Budgets.status == BudgetStatusTypesEnum.ACTIVE,
+                    Budgets.end_date <= now,
+                    Budgets.is_deleted == False,
+                )
+                .limit(chunk_size)
+                .with_for_update(skip_locked=True)
+            )
+            result = session.exec(
+                update(Budgets)
+                .where(Budgets.id.in_(expired.scalar_subquery()))
+                .values(status=BudgetStatusTypesEnum.INACTIVE)
+            )
+            if result.rowcount:
+                session.exec(budgets_changed())
+            session.commit()
+            expired_count += result.rowcount
+            if result.rowcount < chunk_size:
+                return expired_count, time.monotonic() - started
+
+
+def recompute_user_budgets(user_ids: List[UUID]) -> int:
+    where = (
+        Budgets.user_id.in_(user_ids),
+        Budgets.status == BudgetStatusTypesEnum.ACTIVE,
+        Budgets.is_deleted == False,
+    )
+    with Session(engine) as session:
+        session.exec(lock_budgets(*where))
+        result = session.exec(recompute_spend(*where))
+        session.commit()
+        return result.rowcount
+
+
+def recompute_active_budgets(
+    batch_size: int = settings.BUDGET_RECOMPUTE_BATCH,
+    workers: int = settings.BUDGET_RECOMPUTE_WORKERS,
+) -> Tuple[int, float]:
+    # each batch of users is its own short transaction, so a slow batch never
+    # holds locks on every active budget at once
+    started = time.monotonic()
+    with Session(engine) as session:
+        user_ids = session.exec(
+            select(Budgets.user_id)
+            .distinct()
+            .where(
+                Budgets.status == BudgetStatusTypesEnum.ACTIVE,
+                Budgets.is_deleted == False,
+            )
         ).all()
+    batches = [
+        user_ids[start : start + batch_size]
+        for start in range(0, len(user_ids), batch_size)
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        recomputed = sum(pool.map(recompute_user_budgets, batches))
+    return recomputed, time.monotonic() - started
+
+
+def compact_blacklist(chunk_size: int = settings.BLACKLIST_COMPACTION_CHUNK) -> int:
+    deleted = 0
+    with Session(engine) as session:
+        while True:
+            expired = (
+                select(Blacklist.id)
+                .where(Blacklist.exp < int(time.time()))
+                .limit(chunk_size)
+            )
+            result = session.exec(
+                delete(Blacklist).where(Blacklist.id.in_(expired.scalar_subquery()))
+            )
+            session.commit()
+            deleted += result.rowcount
+            if result.rowcount < chunk_size:
+                return deleted
+
+
+def purge_idempotency_keys(chunk_size: int = settings.IDEMPOTENCY_PURGE_CHUNK) -> int:
+    deleted = 0
+    with Session(engine) as session:
+        while True:
+            expired = (
+                select(IdempotencyKeys.user_id, IdempotencyKeys.key)
+                .where(IdempotencyKeys.expires_at <= datetime.now())
+                .limit(chunk_size)
+            )
+            result = session.exec(
+                delete(IdempotencyKeys).where(
+                    tuple_(IdempotencyKeys.user_id, IdempotencyKeys.key).in_(expired)
+                )
+            )
+            session.commit()
+            deleted += result.rowcount
+            if result.rowcount < chunk_size:
+                return deleted
 
-        for budget in get_all_expired_budget:
-            budget.status = BudgetStatusTypesEnum.INACTIVE
-            session.add(budget)
 
+def purge_job_runs(days: int = settings.JOB_RUNS_RETENTION_DAYS) -> int:
+    with Session(engine) as session:
+        result = session.exec(
+            delete(JobRuns).where(
+                JobRuns.started_at < datetime.now() - timedelta(days=days)
+            )
+        )
         session.commit()
+        return result.rowcount
 
 
 def cron_job():
-    change_expired_budgets_status()
-    print("Cron job executed")
+    expired, duration = change_expired_budgets_status()
+    return f"Budget expiry marked {expired} budgets inactive in {duration:.2f}s"
 
 
-scheduler = BackgroundScheduler()
+def budget_recompute_job():
+    recomputed, duration = recompute_active_budgets()
+    return f"Budget recompute refreshed {recomputed} budgets in {duration:.2f}s"
 
-scheduler.add_job(
-    cron_job,
-    CronTrigger(hour=00, minute=00, second=00),
-)
 
-scheduler.start()
+def blacklist_job():
+    deleted = compact_blacklist()
+    return f"Blacklist compaction removed {deleted} expired tokens"
+
+
+def partition_job():
+    created = ensure_partitions()
+    return f"Partition maintenance created {len(created)} transaction partitions"
+
+
+def idempotency_job():
+    deleted = purge_idempotency_keys()
+    return f"Idempotency purge removed {deleted} expired keys"
+
+
+def job_runs_job():
+    deleted = purge_job_runs()
+    return f"Job history purge removed {deleted} runs"
+
+
+JOBS = [
+    JobDefinition("budget_expiry", "0 0 * * *", cron_job),
+    JobDefinition("budget_recompute", "30 0 * * *", budget_recompute_job),
+    JobDefinition("blacklist_compaction", "0 * * * *", blacklist_job),
+    JobDefinition("idempotency_purge", "30 * * * *", idempotency_job),
+    JobDefinition("transaction_partitions", "0 1 * * *", partition_job),
+    JobDefinition("job_runs_purge", "15 2 * * *", job_runs_job),
+]
+
+job_runner = JobRunner(JOBS)
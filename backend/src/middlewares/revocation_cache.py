@@ -0,0 +1,116 @@
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+from sqlalchemy import text
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import settings
+from src.database import engine, pg_listener
+from src.models.models import Blacklist
+from src.utils.bloom import BloomFilter
+from src.utils.metrics import metrics
+
+REVOCATION_CHANNEL = "token_revoked"
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class RevocationCache:
+    def __init__(self, size: int, bloom_capacity: int, error_rate: float) -> None:
+        self.size = size
+        self.bloom_capacity = bloom_capacity
+        self.error_rate = error_rate
+        self._lock = Lock()
+        self._revoked: "OrderedDict[str, float]" = OrderedDict()
+        self._bloom = BloomFilter(bloom_capacity, error_rate)
+        self._synced = False
+
+    def is_revoked(self, digest: str) -> Optional[bool]:
+        # True/False when the cache can answer, None when the database must
+        with self._lock:
+            expires = self._revoked.get(digest)
+            if expires is not None and expires > time.time():
+                self._revoked.move_to_end(digest)
+                result = True
+            elif (
+                self._synced
+                and not self._bloom.is_saturated
+                and digest not in self._bloom
+            ):
+                # past capacity the false-positive rate climbs, so a negative
+                # is only trusted again once the next resync has rebuilt it
+                result = False
+            else:
+                result = None
+
+        metrics.incr("revocation_cache.lookups")
+        metrics.incr(
+            "revocation_cache.misses" if result is None else "revocation_cache.hits"
+        )
+        metrics.gauge(
+            "revocation_cache.hit_rate",
+            metrics.ratio("revocation_cache.hits", "revocation_cache.lookups"),
+        )
+        return result
+
+    def add(self, digest: str, expires: float) -> None:
+        with self._lock:
+            self._revoked[digest] = expires
+            self._revoked.move_to_end(digest)
+            while len(self._revoked) > self.size:
+                self._revoked.popitem(last=False)
+            self._bloom.add(digest)
+            saturated = self._bloom.is_saturated
+        metrics.gauge("revocation_cache.bloom_saturated", int(saturated))
+
+    def reload(self) -> None:
+        with Session(engine) as session:
+            digests = session.exec(
+                select(Blacklist.token_hash).where(Blacklist.exp > int(time.time()))
+            ).all()
+
+        bloom = BloomFilter(max(self.bloom_capacity, 2 * len(digests)), self.error_rate)
+        for digest in digests:
+            bloom.add(digest)
+
+        with self._lock:
+            self._bloom = bloom
+            self._synced = True
+        metrics.gauge("revocation_cache.bloom_entries", bloom.count)
+        metrics.gauge("revocation_cache.bloom_saturated", int(bloom.is_saturated))
+
+    def desync(self) -> None:
+        with self._lock:
+            self._synced = False
+
+    def on_notify(self, payload: str) -> None:
+        digest, _, expires = payload.partition(":")
+        self.add(digest, float(expires or 0))
+
+
+async def publish_revocation(db: AsyncSession, digest: str, expires: float) -> None:
+    # NOTIFY is transactional: other workers only hear about it after commit
+    await db.exec(
+        text("SELECT pg_notify(:channel, :payload)"),
+        params={"channel": REVOCATION_CHANNEL, "payload": f"{digest}:{expires}"},
+    )
+
+
+revocation_cache = RevocationCache(
+    size=settings.REVOCATION_CACHE_SIZE,
+    bloom_capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+)
+
+pg_listener.subscribe(
+    REVOCATION_CHANNEL,
+    revocation_cache.on_notify,
+    on_sync=revocation_cache.reload,
+    on_lost=revocation_cache.desync,
+)
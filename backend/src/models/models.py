@@ -1,8 +1,10 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
-from typing import List
+from typing import List, Optional
 from uuid import UUID, uuid4
 
+from sqlalchemy import DDL, Index, event, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -10,11 +12,22 @@ class CommonBase(SQLModel):
     id: UUID = Field(
         default_factory=uuid4, primary_key=True, unique=True, nullable=False
     )
-    is_active: bool = Field(nullable=True, default=True)
-    is_deleted: bool = Field(default=False, nullable=True)
+    is_active: bool = Field(nullable=False, default=True)
+    is_deleted: bool = Field(default=False, nullable=False)
     created_at: datetime = Field(default_factory=datetime.now, nullable=False)
 
 
+def live_rows_index(table: str, column: str = "created_at") -> Index:
+    # matches the paginator's user filter, is_deleted check and sort order
+    return Index(
+        f"ix_{table}_user_id_{column}_live",
+        "user_id",
+        text(f"{column} DESC"),
+        text("id DESC"),
+        postgresql_where=text("NOT is_deleted"),
+    )
+
+
 class Users(CommonBase, table=True):
     name: str = Field(nullable=True)
     email: str = Field(nullable=True, unique=True, index=True)
@@ -29,6 +42,8 @@ class Users(CommonBase, table=True):
 
 
 class Notifications(CommonBase, table=True):
+    __table_args__ = (live_rows_index("notifications"),)
+
     user_id: UUID = Field(nullable=False, index=True, foreign_key="users.id")
     message: str = Field(nullable=False, default=None)
     is_read: bool = Field(nullable=False, default=False)
@@ -37,6 +52,8 @@ class Notifications(CommonBase, table=True):
 
 
 class Accounts(CommonBase, table=True):
+    __table_args__ = (live_rows_index("accounts"),)
+
     user_id: UUID = Field(nullable=False, index=True, foreign_key="users.id")
     name: str = Field(nullable=False, default=None)
     type: str = Field(nullable=False, default=None)
@@ -48,6 +65,8 @@ class Accounts(CommonBase, table=True):
 
 
 class Categories(CommonBase, table=True):
+    __table_args__ = (live_rows_index("categories"),)
+
     user_id: UUID = Field(nullable=False, index=True, foreign_key="users.id")
     name: str = Field(nullable=False, index=True)
     description: str = Field(nullable=False, default=None)
@@ -58,6 +77,8 @@ class Categories(CommonBase, table=True):
 
 
 class SubCategories(CommonBase, table=True):
+    __table_args__ = (live_rows_index("subcategories"),)
+
     user_id: UUID = Field(nullable=False, index=True, foreign_key="users.id")
     category_id: UUID = Field(nullable=False, index=True, foreign_key="categories.id")
     name: str = Field(nullable=False, index=True)
@@ -85,6 +106,12 @@ class BudgetTypesEnum(str, Enum):
 
 
 class Budgets(CommonBase, table=True):
+    __table_args__ = (
+        live_rows_index("budgets"),
+        # drives the expiry job's scan for active budgets past their end date
+        Index("ix_budgets_status_end_date", "status", "end_date"),
+    )
+
     user_id: UUID = Field(nullable=False, index=True, foreign_key="users.id")
     account_id: UUID = Field(nullable=True, index=True, foreign_key="accounts.id")
     amount: float = Field(nullable=True, default=0.0)
@@ -99,7 +126,8 @@ class Budgets(CommonBase, table=True):
 
 
 class Blacklist(CommonBase, table=True):
-    token: str = Field(nullable=False, index=True)
+    token_hash: str = Field(nullable=False, unique=True, index=True, max_length=64)
+    exp: int = Field(nullable=False, index=True)
 
 
 class TransactionTypesEnum(str, Enum):
@@ -111,6 +139,14 @@ class TransactionTypesEnum(str, Enum):
 
 
 class Transactions(CommonBase, table=True):
+    # range partitioned by month, so the partition key joins the primary key
+    __table_args__ = (
+        live_rows_index("transactions", "transaction_time"),
+        live_rows_index("transactions", "amount"),
+        {"postgresql_partition_by": "RANGE (transaction_time)"},
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True, nullable=False)
     user_id: UUID = Field(nullable=False, index=True, foreign_key="users.id")
     account_id: UUID = Field(nullable=False, index=True, foreign_key="accounts.id")
     category_id: UUID = Field(nullable=False, index=True, foreign_key="categories.id")
@@ -120,9 +156,85 @@ class Transactions(CommonBase, table=True):
     amount: float = Field(nullable=False, default=0.0)
     type: str = Field(nullable=False, default=None)
     description: str = Field(nullable=True, default=None)
-    transaction_time: datetime = Field(default_factory=datetime.now, nullable=True)
+    transaction_time: datetime = Field(
+        default_factory=datetime.now, primary_key=True, nullable=False
+    )
 
     users: Users = Relationship(back_populates="transactions")
     accounts: Accounts = Relationship(back_populates="transactions")
     categories: Categories = Relationship(back_populates="transactions")
     sub_categories: SubCategories = Relationship(back_populates="transactions")
+
+
+# rows outside every monthly partition land here until a partition claims them
+event.listen(
+    Transactions.__table__,
+    "after_create",
+    DDL(
+        "CREATE TABLE IF NOT EXISTS transactions_default PARTITION OF transactions DEFAULT"
+    ),
+)
+
+
+class DailySpending(SQLModel, table=True):
+    # per-day totals kept in step with Transactions so reports read the rollup
+    user_id: UUID = Field(primary_key=True, foreign_key="users.id")
+    day: date = Field(primary_key=True)
+    account_id: UUID = Field(primary_key=True, foreign_key="accounts.id")
+    category_id: UUID = Field(primary_key=True, foreign_key="categories.id")
+    type: str = Field(primary_key=True)
+    total: float = Field(nullable=False, default=0.0)
+    count: int = Field(nullable=False, default=0)
+
+
+class IdempotencyKeys(SQLModel, table=True):
+    user_id: UUID = Field(primary_key=True, foreign_key="users.id")
+    key: str = Field(primary_key=True, max_length=255)
+    fingerprint: str = Field(nullable=False, max_length=64)
+    status_code: Optional[int] = Field(default=None, nullable=True)
+    response: Optional[dict] = Field(default=None, sa_type=JSONB, nullable=True)
+    created_at: datetime = Field(default_factory=datetime.now, nullable=False)
+    expires_at: datetime = Field(nullable=False, index=True)
+
+
+class BudgetAlerts(SQLModel, table=True):
+    # one row per threshold a budget has crossed since its window started
+    budget_id: UUID = Field(primary_key=True, foreign_key="budgets.id")
+    period_start: datetime = Field(primary_key=True)
+    threshold: int = Field(primary_key=True)
+    created_at: datetime = Field(default_factory=datetime.now, nullable=False)
+
+
+class JobStatusEnum(str, Enum):
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    LOST = "lost"
+
+    def __str__(self):
+        return str(self.value)
+
+
+class Jobs(SQLModel, table=True):
+    name: str = Field(primary_key=True, max_length=100)
+    schedule: str = Field(nullable=False)
+    next_run_at: datetime = Field(nullable=False, index=True)
+    attempts: int = Field(nullable=False, default=0)
+    max_attempts: int = Field(nullable=False, default=3)
+    retry_delay_seconds: int = Field(nullable=False, default=60)
+    locked_by: Optional[str] = Field(default=None, nullable=True)
+    locked_until: Optional[datetime] = Field(default=None, nullable=True)
+    last_run_at: Optional[datetime] = Field(default=None, nullable=True)
+    last_status: Optional[str] = Field(default=None, nullable=True)
+
+
+class JobRuns(SQLModel, table=True):
+    id: UUID = Field(default_factory=uuid4, primary_key=True, nullable=False)
+    job_name: str = Field(nullable=False, index=True, foreign_key="jobs.name")
+    worker: str = Field(nullable=False)
+    attempt: int = Field(nullable=False, default=1)
+    status: str = Field(nullable=False, default=JobStatusEnum.RUNNING.value)
+    started_at: datetime = Field(default_factory=datetime.now, nullable=False)
+    finished_at: Optional[datetime] = Field(default=None, nullable=True)
+    result: Optional[str] = Field(default=None, nullable=True)
+    error: Optional[str] = Field(default=None, nullable=True)
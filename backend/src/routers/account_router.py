@@ -9,7 +9,12 @@ from src.models.models import Accounts
 from src.schemas.accounts_schema import AccountsInput, AccountsResult, AccountsUpdate
 from src.schemas.common_schema import ResponseSchema
 from src.utils.fetcher import Fetcher
-from src.utils.paginator import Paginate, PaginationResponse, PaginatorQuery
+from src.utils.paginator import (
+    Paginate,
+    PaginationResponse,
+    PaginatorQuery,
+    count_cache,
+)
 
 router = APIRouter(tags=["Accounts"], prefix="/accounts", dependencies=[Depends(auth)])
 
@@ -23,6 +28,7 @@ async def get_accounts(
         input_data=input_data,
         session=db,
         filters=(Accounts.user_id == request.session["user"]["id"],),
+        owner_id=request.session["user"]["id"],
     )
     return PaginationResponse(
         pagination=all_accounts,
@@ -36,7 +42,7 @@ async def get_accounts(
     response_model=ResponseSchema[AccountsResult],
 )
 async def get_account(request: Request, db: database, account_id: UUID):
-    get_accounts = Fetcher(
+    get_accounts = await Fetcher(
         database=db,
         table=Accounts,
         where=(
@@ -61,9 +67,9 @@ async def create_account(
     db: database,
     input_data: AccountsInput,
 ):
-    new_account = AccountController(db, request.session["user"]["id"]).add_accounts(
-        AccountsInput(**input_data.model_dump())
-    )
+    new_account = await AccountController(
+        db, request.session["user"]["id"]
+    ).add_accounts(AccountsInput(**input_data.model_dump()))
     return ResponseSchema(
         message="Account created",
         data=AccountsResult(**new_account.model_dump()),
@@ -78,7 +84,7 @@ async def create_account(
 async def update_account(
     request: Request, input_data: AccountsUpdate, account_id: UUID, db: database
 ):
-    update_account = AccountController(
+    update_account = await AccountController(
         db, request.session["user"]["id"]
     ).update_accounts(AccountsUpdate(**input_data.model_dump()), account_id)
     return ResponseSchema(
@@ -89,7 +95,7 @@ async def update_account(
 
 @router.delete("/{account_id}")
 async def delete_account(request: Request, db: database, account_id: UUID):
-    get_accounts = Fetcher(
+    get_accounts = await Fetcher(
         database=db,
         table=Accounts,
         where=(
@@ -99,5 +105,6 @@ async def delete_account(request: Request, db: database, account_id: UUID):
         error="Account not found",
     ).get_one()
     get_accounts.is_deleted = True
-    db.commit()
+    await db.commit()
+    count_cache.invalidate(request.session["user"]["id"])
     return {"message": "Account deleted"}
@@ -29,7 +29,7 @@ router = APIRouter(
     response_model=ResponseSchema[SignupResultSchema],
 )
 async def signup(input_data: SignupSchema, db: database):
-    signup_ = AuthController(
+    signup_ = await AuthController(
         db, AuthControllerInput(**input_data.model_dump())
     ).signup()
     return ResponseSchema(
@@ -44,7 +44,7 @@ async def signup(input_data: SignupSchema, db: database):
     status_code=status.HTTP_200_OK,
 )
 async def login(input_data: LoginSchema, db: database):
-    login_ = AuthController(
+    login_ = await AuthController(
         db,
         AuthControllerInput(**input_data.model_dump()),
     ).login()
@@ -62,7 +62,7 @@ class User(SQLModel):
 
 @router.get("/me", status_code=status.HTTP_200_OK, dependencies=[Depends(auth)])
 async def profile_me(request: Request, db: database):
-    get_accounts = Fetcher(
+    get_accounts = await Fetcher(
         database=db,
         table=Users,
         where=(Users.id == request.session["user"]["id"],),
@@ -79,5 +79,5 @@ async def profile_me(request: Request, db: database):
 async def logout_(
     db: database, token: HTTPAuthorizationCredentials = Depends(BearerToken)
 ):
-    logout(token.credentials, db)
+    await logout(token.credentials, db)
     return {"message": "Logout successful"}
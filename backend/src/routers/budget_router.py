@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, Request, status
@@ -9,7 +9,12 @@ from src.database import database
 from src.middlewares.auth import auth
 from src.models.models import Budgets, BudgetStatusTypesEnum, BudgetTypesEnum
 from src.routers.notification_router import manager
-from src.schemas.bugdet_schema import BudgetInput, BudgetResult, BudgetUpdate
+from src.schemas.bugdet_schema import (
+    BudgetForecast,
+    BudgetInput,
+    BudgetResult,
+    BudgetUpdate,
+)
 from src.schemas.common_schema import ResponseSchema
 from src.utils.fetcher import Fetcher
 from src.utils.paginator import Paginate, PaginationResponse, PaginatorQuery
@@ -47,6 +52,7 @@ async def get_budgets(
         input_data=input_data,
         session=db,
         filters=(Budgets.user_id == request.session["user"]["id"], *filter),
+        owner_id=request.session["user"]["id"],
     )
     return PaginationResponse(
         pagination=paginate,
@@ -60,7 +66,7 @@ async def get_budgets(
     response_model=ResponseSchema[BudgetResult],
 )
 async def get_budget_active(request: Request, db: database):
-    budget = Fetcher(
+    budget = await Fetcher(
         database=db,
         table=Budgets,
         where=(
@@ -76,13 +82,23 @@ async def get_budget_active(request: Request, db: database):
     )
 
 
+@router.get(
+    "/forecast",
+    status_code=status.HTTP_200_OK,
+    response_model=ResponseSchema[List[BudgetForecast]],
+)
+async def get_budgets_forecast(request: Request, db: database):
+    forecasts = await BudgetController(request.session["user"]["id"], db).forecast()
+    return ResponseSchema(message="Budget forecast", data=forecasts)
+
+
 @router.get(
     "/{budget_id}",
     status_code=status.HTTP_200_OK,
     response_model=ResponseSchema[BudgetResult],
 )
 async def get_budget_(request: Request, db: database, budget_id: UUID):
-    budget = Fetcher(
+    budget = await Fetcher(
         database=db,
         table=Budgets,
         where=(
@@ -104,7 +120,7 @@ async def get_budget_(request: Request, db: database, budget_id: UUID):
     response_model=ResponseSchema[BudgetResult],
 )
 async def get_budget(db: database, request: Request, account_id: UUID):
-    budget = Fetcher(
+    budget = await Fetcher(
         database=db,
         table=Budgets,
         where=(
@@ -129,9 +145,9 @@ async def get_budget(db: database, request: Request, account_id: UUID):
 async def create_budget_account(
     db: database, request: Request, input_data: BudgetInput, account_id: UUID
 ):
-    new_budget = BudgetController(request.session["user"]["id"], db).add_new_budget(
-        input_data, account_id
-    )
+    new_budget = await BudgetController(
+        request.session["user"]["id"], db
+    ).add_new_budget(input_data, account_id)
     return ResponseSchema(
         message="Budget created",
         data=BudgetResult(**new_budget.model_dump()),
@@ -144,7 +160,7 @@ async def create_budget_account(
 async def create_overall_budget(
     db: database, request: Request, input_data: BudgetInput
 ):
-    new_budget = BudgetController(
+    new_budget = await BudgetController(
         request.session["user"]["id"], db
     ).add_new_overall_budget(input_data)
     return ResponseSchema(
@@ -161,7 +177,7 @@ async def create_overall_budget(
 async def update_budget(
     db: database, budget_id: UUID, request: Request, input_data: BudgetUpdate
 ):
-    update = BudgetController(request.session["user"]["id"], db).update_budget(
+    update = await BudgetController(request.session["user"]["id"], db).update_budget(
         input_data, budget_id
     )
     return ResponseSchema(
@@ -1,6 +1,7 @@
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, Request, status
+from sqlalchemy.orm import joinedload, selectinload
 
 from src.controllers.categories_controller import (
     CategoryController,
@@ -20,7 +21,12 @@ from src.schemas.categories_schema import (
 )
 from src.schemas.common_schema import ResponseSchema
 from src.utils.fetcher import Fetcher
-from src.utils.paginator import Paginate, PaginationResponse, PaginatorQuery
+from src.utils.paginator import (
+    Paginate,
+    PaginationResponse,
+    PaginatorQuery,
+    count_cache,
+)
 
 router = APIRouter(
     tags=["Categories"], prefix="/categories", dependencies=[Depends(auth)]
@@ -30,6 +36,11 @@ router_sub = APIRouter(
     tags=["SubCategories"], prefix="/sub_categories", dependencies=[Depends(auth)]
 )
 
+CATEGORY_LOADERS = (
+    selectinload(Categories.sub_categories.and_(SubCategories.is_deleted == False)),
+)
+SUB_CATEGORY_LOADERS = (joinedload(SubCategories.categories),)
+
 
 @router.get(
     "",
@@ -44,6 +55,8 @@ async def get_categories(
         input_data=input_data,
         session=db,
         filters=(Categories.user_id == request.session["user"]["id"],),
+        owner_id=request.session["user"]["id"],
+        options=CATEGORY_LOADERS,
     )
     return PaginationResponse(
         pagination=pagination,
@@ -67,7 +80,7 @@ async def get_categories(
     response_model=ResponseSchema[CategoryResponse],
 )
 async def get_category(db: database, category_id: UUID):
-    get_category = Fetcher(
+    get_category = await Fetcher(
         database=db,
         table=Categories,
         where=(Categories.id == category_id,),
@@ -85,9 +98,9 @@ async def get_category(db: database, category_id: UUID):
     response_model=ResponseSchema[CategoryResponse],
 )
 async def create_category(request: Request, db: database, input_data: CategoryInput):
-    add_category = CategoryController(db, request.session["user"]["id"]).add_category(
-        input_data
-    )
+    add_category = await CategoryController(
+        db, request.session["user"]["id"]
+    ).add_category(input_data)
     return ResponseSchema(
         message="Category created",
         data=CategoryResponse(**add_category.model_dump()),
@@ -102,7 +115,7 @@ async def create_category(request: Request, db: database, input_data: CategoryIn
 async def update_category(
     db: database, request: Request, category_id: UUID, input_data: CategoryInput
 ):
-    update_category = CategoryController(
+    update_category = await CategoryController(
         db, request.session["user"]["id"]
     ).update_category(input_data, category_id)
     return ResponseSchema(
@@ -115,8 +128,8 @@ async def update_category(
     "/{category_id}",
     status_code=status.HTTP_200_OK,
 )
-async def delete_category(category_id: UUID, db: database):
-    get_category = Fetcher(
+async def delete_category(request: Request, category_id: UUID, db: database):
+    get_category = await Fetcher(
         database=db,
         table=Categories,
         where=(Categories.id == category_id,),
@@ -124,7 +137,8 @@ async def delete_category(category_id: UUID, db: database):
     ).get_one()
 
     get_category.is_deleted = True
-    db.commit()
+    await db.commit()
+    count_cache.invalidate(request.session["user"]["id"])
     return {"message": "Category deleted"}
 
 
@@ -141,6 +155,8 @@ async def get_sub_categories(
         input_data=input_data,
         session=db,
         filters=(SubCategories.user_id == request.session["user"]["id"],),
+        owner_id=request.session["user"]["id"],
+        options=SUB_CATEGORY_LOADERS,
     )
     return PaginationResponse(
         pagination=pagination,
@@ -160,7 +176,7 @@ async def get_sub_categories(
     response_model=ResponseSchema[SubCategoryResponse],
 )
 async def get_sub_category(sub_category_id: UUID, db: database):
-    get_category = Fetcher(
+    get_category = await Fetcher(
         database=db,
         table=SubCategories,
         where=(SubCategories.id == sub_category_id,),
@@ -180,7 +196,7 @@ async def get_sub_category(sub_category_id: UUID, db: database):
 async def create_sub_category(
     input_data: SubCategoryInput, db: database, request: Request
 ):
-    add_new_sub_category = SubCategoryController(
+    add_new_sub_category = await SubCategoryController(
         database=db,
         user=request.session["user"]["id"],
     ).add_sub_category(input_data)
@@ -200,7 +216,7 @@ async def update_sub_category(
     sub_category_id: UUID, request: Request, input_data: SubCategoryUpdate, db: database
 ):
 
-    update = SubCategoryController(
+    update = await SubCategoryController(
         database=db,
         user=request.session["user"]["id"],
     ).update_category(input_data, sub_category_id)
@@ -212,8 +228,8 @@ async def update_sub_category(
 
 
 @router_sub.delete("/{sub_category_id}", status_code=status.HTTP_200_OK)
-async def delete_sub_category(sub_category_id: UUID, db: database):
-    get_category = Fetcher(
+async def delete_sub_category(request: Request, sub_category_id: UUID, db: database):
+    get_category = await Fetcher(
         database=db,
         table=SubCategories,
         where=(SubCategories.id == sub_category_id,),
@@ -221,5 +237,6 @@ async def delete_sub_category(sub_category_id: UUID, db: database):
     ).get_one()
 
     get_category.is_deleted = True
-    db.commit()
+    await db.commit()
+    count_cache.invalidate(request.session["user"]["id"])
     return {"message": "Subcategory  deleted"}
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends, status
+
+from src.middlewares.auth import auth
+from src.schemas.common_schema import ResponseSchema
+from src.utils.metrics import metrics
+
+router = APIRouter(tags=["Metrics"], prefix="/metrics", dependencies=[Depends(auth)])
+
+
+@router.get("", status_code=status.HTTP_200_OK, response_model=ResponseSchema[dict])
+async def get_metrics():
+    return ResponseSchema(message="Metrics fetched", data=metrics.snapshot())
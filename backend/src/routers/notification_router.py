@@ -10,7 +10,12 @@ from src.middlewares.auth import auth
 from src.models.models import Notifications
 from src.schemas.common_schema import ResponseSchema
 from src.utils.fetcher import Fetcher
-from src.utils.paginator import Paginate, PaginationResponse, PaginatorQuery
+from src.utils.paginator import (
+    Paginate,
+    PaginationResponse,
+    PaginatorQuery,
+    count_cache,
+)
 
 router_notification = APIRouter(
     tags=["Notification"],
@@ -79,6 +84,7 @@ async def get_user_notification_(
         input_data=input_data,
         session=db,
         filters=(Notifications.user_id == request.session["user"]["id"],),
+        owner_id=request.session["user"]["id"],
     )
     return PaginationResponse(
         pagination=all_notifications,
@@ -94,7 +100,7 @@ async def get_user_notification_(
     response_model=ResponseSchema[NotificationResponseSchema],
 )
 async def remove_notification(request: Request, db: database, notification_id: UUID):
-    get_notifications = Fetcher(
+    get_notifications = await Fetcher(
         database=db,
         table=Notifications,
         where=(
@@ -105,8 +111,9 @@ async def remove_notification(request: Request, db: database, notification_id: U
     ).get_one()
 
     get_notifications.is_deleted = True
-    db.commit()
-    db.refresh(get_notifications)
+    await db.commit()
+    count_cache.invalidate(request.session["user"]["id"])
+    await db.refresh(get_notifications)
 
     return ResponseSchema(
         message="Notification read",
@@ -120,7 +127,7 @@ async def remove_notification(request: Request, db: database, notification_id: U
     response_model=ResponseSchema[NotificationResponseSchema],
 )
 async def get_user_notification(request: Request, db: database, notification_id: UUID):
-    get_notifications = Fetcher(
+    get_notifications = await Fetcher(
         database=db,
         table=Notifications,
         where=(
@@ -131,8 +138,8 @@ async def get_user_notification(request: Request, db: database, notification_id:
     ).get_one()
 
     get_notifications.is_read = True
-    db.commit()
-    db.refresh(get_notifications)
+    await db.commit()
+    await db.refresh(get_notifications)
 
     return ResponseSchema(
         message="Notification read",
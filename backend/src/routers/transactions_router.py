@@ -2,9 +2,19 @@ from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi import APIRouter, Depends, Header, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import joinedload
 
-from src.controllers.transactions_controller import add_new_transaction
+from src.controllers.transactions_controller import (
+    EXPORT_COLUMNS,
+    BulkTransactionController,
+    add_new_transaction,
+    export_transactions,
+    filter_clauses,
+    transaction_created_response,
+    transactions_report,
+)
 from src.database import database
 from src.middlewares.auth import auth
 from src.models.models import Transactions, TransactionTypesEnum
@@ -12,17 +22,57 @@ from src.schemas.accounts_schema import AccountsResult
 from src.schemas.categories_schema import CategoryResponse
 from src.schemas.common_schema import ResponseSchema
 from src.schemas.transactions_schema import (
+    BulkTransactionsResult,
+    ReportGroupEnum,
+    ReportIntervalEnum,
+    TransactionFilters,
     TransactionsFullResponse,
     TransactionsInput,
+    TransactionSortEnum,
+    TransactionsReportRow,
     TransactionsResponse,
 )
 from src.utils.fetcher import Fetcher
-from src.utils.paginator import Paginate, PaginationResponse, PaginatorQuery
+from src.utils.idempotency import (
+    IDEMPOTENCY_HEADER,
+    claim_idempotency_key,
+    request_fingerprint,
+)
+from src.utils.paginator import (
+    Paginate,
+    PaginationResponse,
+    PaginatorQuery,
+    SortOrderEnum,
+)
+from src.utils.record_stream import RecordFormatEnum, encode_records, iter_records
 
 router = APIRouter(
     tags=["transactions"], prefix="/transactions", dependencies=[Depends(auth)]
 )
 
+TRANSACTION_LOADERS = (
+    joinedload(Transactions.accounts),
+    joinedload(Transactions.categories),
+)
+
+
+def transaction_filters(
+    request: Request,
+    type: Optional[TransactionTypesEnum] = None,
+    categories: Optional[List[UUID]] = Query(None),
+    accounts: Optional[List[UUID]] = Query(None),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+) -> TransactionFilters:
+    return TransactionFilters(
+        user_id=request.session["user"]["id"],
+        type=type,
+        categories=categories,
+        accounts=accounts,
+        start_date=start_date,
+        end_date=end_date,
+    )
+
 
 @router.get(
     "",
@@ -33,29 +83,19 @@ async def get_transactions(
     request: Request,
     db: database,
     input_data: Paginate = Depends(),
-    type: Optional[TransactionTypesEnum] = None,
-    categories: Optional[List[UUID]] = Query(None),
-    accounts: Optional[List[UUID]] = Query(None),
-    start_date: Optional[datetime] = Query(None),
-    end_date: Optional[datetime] = Query(None),
+    filters: TransactionFilters = Depends(transaction_filters),
+    sort: TransactionSortEnum = TransactionSortEnum.TRANSACTION_TIME,
+    order: SortOrderEnum = SortOrderEnum.DESC,
 ):
-    filters = ()
-    if type:
-        filters += (Transactions.type == type,)
-    if categories:
-        filters += (Transactions.category_id.in_(categories),)
-    if accounts:
-        filters += (Transactions.account_id.in_(accounts),)
-    if start_date:
-        filters += (Transactions.created_at >= start_date,)
-    if end_date:
-        filters += (Transactions.created_at <= end_date,)
-
     pagination, data = await PaginatorQuery.paginate(
         table_name=Transactions,
         input_data=input_data,
         session=db,
-        filters=(Transactions.user_id == request.session["user"]["id"],) + filters,
+        filters=filter_clauses(filters),
+        owner_id=request.session["user"]["id"],
+        options=TRANSACTION_LOADERS,
+        sort_column=getattr(Transactions, sort.value),
+        order=order,
     )
     return PaginationResponse(
         pagination=pagination,
@@ -70,9 +110,45 @@ async def get_transactions(
     )
 
 
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_transactions_stream(
+    format: RecordFormatEnum = RecordFormatEnum.CSV,
+    filters: TransactionFilters = Depends(transaction_filters),
+):
+    return StreamingResponse(
+        encode_records(
+            export_transactions(filters),
+            [column.key for column in EXPORT_COLUMNS],
+            format,
+        ),
+        media_type=format.media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions.{format.value}"'
+        },
+    )
+
+
+@router.get(
+    "/report",
+    status_code=status.HTTP_200_OK,
+    response_model=ResponseSchema[List[TransactionsReportRow]],
+)
+async def get_transactions_report(
+    db: database,
+    group_by: List[ReportGroupEnum] = Query([ReportGroupEnum.TYPE]),
+    interval: Optional[ReportIntervalEnum] = None,
+    filters: TransactionFilters = Depends(transaction_filters),
+):
+    rows = await transactions_report(db, filters, group_by, interval)
+    return ResponseSchema(
+        message="Transactions report",
+        data=[TransactionsReportRow(**row) for row in rows],
+    )
+
+
 @router.get("/{transaction_id}")
 async def get_transaction(transaction_id: UUID, db: database):
-    get_single_transaction = Fetcher(
+    get_single_transaction = await Fetcher(
         database=db,
         table=Transactions,
         where=(Transactions.id == transaction_id,),
@@ -86,12 +162,46 @@ async def get_transaction(transaction_id: UUID, db: database):
 
 @router.post("")
 async def create_transaction(
-    request: Request, db: database, input_data: TransactionsInput
+    request: Request,
+    db: database,
+    input_data: TransactionsInput,
+    idempotency_key: Optional[str] = Header(
+        None, alias=IDEMPOTENCY_HEADER, max_length=255
+    ),
 ):
+    user_id = request.session["user"]["id"]
+    if idempotency_key:
+        replay = await claim_idempotency_key(
+            db, user_id, idempotency_key, request_fingerprint(input_data)
+        )
+        if replay:
+            return replay
+
     new_transaction = await add_new_transaction(
-        db, input_data, request.session["user"]["id"]
+        db, input_data, user_id, idempotency_key
     )
+    return transaction_created_response(new_transaction)
+
+
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_200_OK,
+    response_model=ResponseSchema[BulkTransactionsResult],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def create_transactions_bulk(request: Request, db: database):
+    result = await BulkTransactionController(
+        db, request.session["user"]["id"]
+    ).add_transactions(iter_records(request))
     return ResponseSchema(
-        message="Transaction added successfully",
-        data=TransactionsResponse(**new_transaction.model_dump()),
+        message=f"{result.created} transactions added, {result.failed} failed",
+        data=result,
     )
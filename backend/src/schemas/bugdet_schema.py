@@ -28,3 +28,18 @@ class BudgetUpdate(SQLModel):
     limit: Optional[float] = None
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
+
+
+class BudgetForecast(SQLModel):
+    budget_id: UUID
+    type: str
+    account_id: Optional[UUID] = None
+    start_date: datetime
+    end_date: datetime
+    limit: float
+    spent: float
+    burn_rate: float
+    projected_spend: float
+    days_remaining: float
+    over_limit: bool
+    projected_limit_date: Optional[datetime] = None
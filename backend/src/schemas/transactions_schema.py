@@ -1,7 +1,10 @@
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from enum import Enum
+from typing import List, Optional
 from uuid import UUID
 
+from pydantic import field_validator
 from sqlmodel import SQLModel
 
 from src.schemas.accounts_schema import AccountsResult
@@ -15,6 +18,15 @@ class TransactionsInput(SQLModel):
     category_id: Optional[UUID] = None
     sub_category_id: Optional[UUID] = None
     account_id: UUID
+    transaction_time: Optional[datetime] = None
+
+    @field_validator("transaction_time")
+    @classmethod
+    def local_time(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # stored naive in server time, like every other timestamp
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone().replace(tzinfo=None)
+        return value
 
 
 class TransactionsResponse(SQLModel):
@@ -34,3 +46,57 @@ class TransactionsFullResponse(SQLModel):
     transaction: TransactionsResponse
     account: AccountsResult
     category: CategoryResponse
+
+
+class BulkTransactionError(SQLModel):
+    row: int
+    error: str
+
+
+class BulkTransactionsResult(SQLModel):
+    created: int = 0
+    failed: int = 0
+    errors: List[BulkTransactionError] = []
+    errors_truncated: bool = False
+
+
+class TransactionSortEnum(str, Enum):
+    TRANSACTION_TIME = "transaction_time"
+    AMOUNT = "amount"
+
+
+class ReportGroupEnum(str, Enum):
+    CATEGORY = "category"
+    SUB_CATEGORY = "sub_category"
+    ACCOUNT = "account"
+    TYPE = "type"
+
+
+class ReportIntervalEnum(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class TransactionsReportRow(SQLModel):
+    period: Optional[datetime] = None
+    type: Optional[str] = None
+    account_id: Optional[UUID] = None
+    account: Optional[str] = None
+    category_id: Optional[UUID] = None
+    category: Optional[str] = None
+    sub_category_id: Optional[UUID] = None
+    sub_category: Optional[str] = None
+    income: float
+    expense: float
+    count: int
+
+
+@dataclass
+class TransactionFilters:
+    user_id: UUID
+    type: Optional[str] = None
+    categories: Optional[List[UUID]] = None
+    accounts: Optional[List[UUID]] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from threading import Lock
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from src.utils.metrics import metrics
+
+ALL_USERS = "*"
+
+
+@dataclass(frozen=True)
+class CachedBudget:
+    id: UUID
+    type: str
+    account_id: Optional[UUID]
+    start_date: Optional[datetime]
+    end_date: Optional[datetime]
+
+    def covers(self, at: datetime) -> bool:
+        return (self.start_date is None or self.start_date <= at) and (
+            self.end_date is None or at <= self.end_date
+        )
+
+
+class BudgetCache:
+    def __init__(self, ttl: float, max_users: int) -> None:
+        self.ttl = ttl
+        self.max_users = max_users
+        self._lock = Lock()
+        self._entries: "OrderedDict[str, Tuple[float, List[CachedBudget]]]" = (
+            OrderedDict()
+        )
+        self._generation = 0
+        self._synced = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self._synced
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, user_id) -> Optional[List[CachedBudget]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(str(user_id))
+            if entry is not None:
+                self._entries.move_to_end(str(user_id))
+        if entry is None or entry[0] < time.monotonic():
+            metrics.incr("budget_cache.misses")
+            return None
+        metrics.incr("budget_cache.hits")
+        return entry[1]
+
+    def set(self, user_id, budgets: List[CachedBudget], generation: int) -> None:
+        # a load that raced an invalidation may have read the old budgets
+        with self._lock:
+            if not self.enabled or generation != self._generation:
+                return
+            self._entries[str(user_id)] = (time.monotonic() + self.ttl, budgets)
+            self._entries.move_to_end(str(user_id))
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id) -> None:
+        with self._lock:
+            self._generation += 1
+            if str(user_id) == ALL_USERS:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(user_id), None)
+
+    def resync(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._synced = True
+
+    def desync(self) -> None:
+        # without the listener other workers' changes go unnoticed
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._synced = False
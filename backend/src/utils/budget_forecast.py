@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import List, Sequence
+
+import numpy as np
+
+DAY = np.timedelta64(1, "D")
+
+
+def forecast_budgets(
+    starts: Sequence[datetime],
+    ends: Sequence[datetime],
+    limits: Sequence[float],
+    spend_budget: Sequence[int],
+    spend_age: Sequence[int],
+    spend_amount: Sequence[float],
+    now: datetime,
+    lookback_days: int,
+) -> List[dict]:
+    # budgets are the rows of the inputs; the daily spend series of every
+    # budget arrives flattened, tagged with the budget's row in spend_budget
+    # and aged in whole days before now
+    count = len(limits)
+    start = np.array(starts, dtype="datetime64[s]")
+    end = np.array(ends, dtype="datetime64[s]")
+    limit = np.array(limits, dtype=float)
+    at = np.datetime64(now, "s")
+
+    index = np.array(spend_budget, dtype=np.int64)
+    amount = np.array(spend_amount, dtype=float)
+    age = np.array(spend_age, dtype=np.int64)
+
+    elapsed = np.clip(
+        (np.minimum(at, end) - start) / DAY, 1, np.maximum((end - start) / DAY, 1)
+    )
+    lookback = np.minimum(elapsed, lookback_days)
+    recent = age < np.ceil(lookback[index])
+
+    spent = np.bincount(index, weights=amount, minlength=count)
+    burn_rate = np.bincount(index, weights=amount * recent, minlength=count) / lookback
+    # a budget that hasn't started yet has its whole period ahead of it
+    since = np.maximum(at, start)
+    remaining = np.maximum((end - since) / DAY, 0)
+    projected = spent + burn_rate * remaining
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_to_limit = np.where(burn_rate > 0, (limit - spent) / burn_rate, np.inf)
+    crosses = (spent < limit) & (days_to_limit <= remaining)
+    crossing = since + np.where(crosses, days_to_limit * 86_400, 0).astype(
+        "timedelta64[s]"
+    )
+
+    return [
+        {
+            "spent": total,
+            "burn_rate": rate,
+            "projected_spend": projection,
+            "days_remaining": days,
+            "over_limit": over,
+            "projected_limit_date": date if crossed else None,
+        }
+        for total, rate, projection, days, over, date, crossed in zip(
+            spent.tolist(),
+            burn_rate.tolist(),
+            projected.tolist(),
+            remaining.tolist(),
+            (spent >= limit).tolist(),
+            crossing.tolist(),
+            crosses.tolist(),
+        )
+    ]
@@ -0,0 +1,53 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Tuple
+
+from src.utils.metrics import metrics
+
+
+class CountCache:
+    def __init__(self, ttl: float, max_users: int, max_keys_per_user: int) -> None:
+        self.ttl = ttl
+        self.max_users = max_users
+        self.max_keys_per_user = max_keys_per_user
+        self._lock = Lock()
+        # both levels are LRU: a user's filter combinations are unbounded
+        self._entries: "OrderedDict[str, OrderedDict[str, Tuple[float, int]]]" = (
+            OrderedDict()
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, user_id, key: str) -> Optional[int]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entries = self._entries.get(str(user_id))
+            entry = entries.get(key) if entries is not None else None
+            if entry is not None:
+                entries.move_to_end(key)
+        if entry is None or entry[0] < time.monotonic():
+            metrics.incr("count_cache.misses")
+            return None
+        metrics.incr("count_cache.hits")
+        return entry[1]
+
+    def set(self, user_id, key: str, count: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            entries = self._entries.setdefault(str(user_id), OrderedDict())
+            entries[key] = (time.monotonic() + self.ttl, count)
+            entries.move_to_end(key)
+            while len(entries) > self.max_keys_per_user:
+                entries.popitem(last=False)
+            self._entries.move_to_end(str(user_id))
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id) -> None:
+        with self._lock:
+            self._entries.pop(str(user_id), None)
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Generic, List, Optional, TypeVar
+
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+E = TypeVar("E")
+
+_STOP = object()
+
+
+class EventPipeline(Generic[E]):
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[List[E]], Awaitable[None]],
+        max_size: int,
+        batch_size: int,
+        max_wait: float,
+    ) -> None:
+        self.name = name
+        self.handler = handler
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, event: E) -> None:
+        # called after commit, so a full queue drops the side effects, never
+        # the request
+        try:
+            self.queue.put_nowait((time.monotonic(), event))
+        except asyncio.QueueFull:
+            metrics.incr(f"{self.name}.dropped")
+            logger.warning("%s queue is full, dropping event", self.name)
+        metrics.gauge(f"{self.name}.queue_depth", self.queue.qsize())
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        # queued events are handled before the worker exits
+        if self._task is None or self._task.done():
+            return
+        await self.queue.put((time.monotonic(), _STOP))
+        await self._task
+
+    async def _next_batch(self) -> list:
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size and batch[-1][1] is not _STOP:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            stopping = batch[-1][1] is _STOP
+            events = [event for _, event in batch if event is not _STOP]
+
+            if events:
+                metrics.gauge(
+                    f"{self.name}.lag_seconds", time.monotonic() - batch[0][0]
+                )
+                try:
+                    await self.handler(events)
+                    metrics.incr(f"{self.name}.processed", len(events))
+                except Exception:
+                    metrics.incr(f"{self.name}.failed", len(events))
+                    logger.exception("%s handler failed", self.name)
+                metrics.incr(f"{self.name}.batches")
+            metrics.gauge(f"{self.name}.queue_depth", self.queue.qsize())
+
+            if stopping:
+                return
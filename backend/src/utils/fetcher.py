@@ -1,7 +1,10 @@
-from typing import Generic, Optional, TypeVar
+from typing import Dict, Generic, Optional, Set, TypeVar
+from uuid import UUID
 
 from fastapi import HTTPException, status
-from sqlmodel import Session, select
+from sqlalchemy import literal, union_all
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 T = TypeVar("T")
 
@@ -11,7 +14,7 @@ T = TypeVar("T")
 class Fetcher(Generic[T]):
     def __init__(
         self,
-        database: Session,
+        database: AsyncSession,
         table: T,
         where: Optional[tuple] = (),
         error: Optional[str] = "Record not found",
@@ -23,43 +26,72 @@ class Fetcher(Generic[T]):
         self.error = error
         self.status = status_code
 
-    def query(self):
-        query = select(self.table).where(
+    def query(self, *columns):
+        query = select(*(columns or (self.table,))).where(
             *self.where,
             getattr(self.table, "is_deleted") == False,
         )
 
         return query
 
-    def get_one(self):
+    async def get_one(self):
         get_query = self.query()
-        get_single_value = self.database.exec(get_query).first()
+        get_single_value = (await self.database.exec(get_query)).first()
 
         if not get_single_value:
             raise HTTPException(self.status, self.error)
 
         return get_single_value
 
-    def get_all(self):
+    async def get_all(self):
         get_query = self.query()
 
-        get_all_values = self.database.exec(get_query).all()
+        get_all_values = (await self.database.exec(get_query)).all()
         if not get_all_values:
             raise HTTPException(self.status, self.error)
 
         return get_all_values
 
-    def get_exist(self):
+    async def get_exist(self):
         get_query = self.query()
 
-        get_single_value = self.database.exec(get_query).first()
+        get_single_value = (await self.database.exec(get_query)).first()
         if get_single_value:
             raise HTTPException(self.status, self.error)
 
         return get_single_value
 
-    def get_value(self):
+    async def get_value(self):
         get_query = self.query()
-        get_single_value = self.database.exec(get_query).first()
+        get_single_value = (await self.database.exec(get_query)).first()
 
         return get_single_value
+
+
+class MultiFetcher:
+    def __init__(self, database: AsyncSession, fetchers: Dict[str, Fetcher]) -> None:
+        self.database = database
+        self.fetchers = fetchers
+
+    def query(self):
+        return union_all(
+            *(
+                fetcher.query(literal(key).label("key"), fetcher.table.id)
+                for key, fetcher in self.fetchers.items()
+            )
+        )
+
+    async def get_id_sets(self) -> Dict[str, Set[UUID]]:
+        found: Dict[str, Set[UUID]] = {key: set() for key in self.fetchers}
+        for key, id in (await self.database.exec(self.query())).all():
+            found[key].add(id)
+
+        return found
+
+    async def get_ids(self) -> Dict[str, UUID]:
+        found = {key: id for key, id in (await self.database.exec(self.query())).all()}
+        for key, fetcher in self.fetchers.items():
+            if key not in found:
+                raise HTTPException(fetcher.status, fetcher.error)
+
+        return found
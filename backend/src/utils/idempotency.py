@@ -0,0 +1,80 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import settings
+from src.models.models import IdempotencyKeys
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def request_fingerprint(payload: BaseModel) -> str:
+    return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+
+async def claim_idempotency_key(
+    db: AsyncSession, user_id: UUID, key: str, fingerprint: str
+) -> Optional[JSONResponse]:
+    # claims the key inside the caller's transaction; a concurrent duplicate
+    # blocks on the row until the first request commits or rolls back, then
+    # gets the stored response. None means the caller owns the key.
+    now = datetime.now()
+    claim = pg_insert(IdempotencyKeys).values(
+        user_id=user_id,
+        key=key,
+        fingerprint=fingerprint,
+        created_at=now,
+        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+    )
+    claimed = await db.exec(
+        claim.on_conflict_do_update(
+            index_elements=[IdempotencyKeys.user_id, IdempotencyKeys.key],
+            set_={
+                "fingerprint": claim.excluded.fingerprint,
+                "status_code": None,
+                "response": None,
+                "created_at": claim.excluded.created_at,
+                "expires_at": claim.excluded.expires_at,
+            },
+            where=IdempotencyKeys.expires_at <= now,
+        ).returning(IdempotencyKeys.key)
+    )
+    if claimed.first():
+        return None
+
+    stored = (
+        await db.exec(
+            select(IdempotencyKeys).where(
+                IdempotencyKeys.user_id == user_id, IdempotencyKeys.key == key
+            )
+        )
+    ).one()
+    if stored.fingerprint != fingerprint:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            f"{IDEMPOTENCY_HEADER} was already used for a different request",
+        )
+    return JSONResponse(
+        content=stored.response,
+        status_code=stored.status_code,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+async def store_idempotent_response(
+    db: AsyncSession, user_id: UUID, key: str, status_code: int, response: BaseModel
+) -> None:
+    await db.exec(
+        update(IdempotencyKeys)
+        .where(IdempotencyKeys.user_id == user_id, IdempotencyKeys.key == key)
+        .values(status_code=status_code, response=response.model_dump(mode="json"))
+    )
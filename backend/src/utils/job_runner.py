@@ -0,0 +1,281 @@
+import logging
+import os
+import socket
+import traceback
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from threading import Event, Thread
+from typing import Callable, Dict, List, Optional
+
+from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy import case, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, select, update
+
+from src.config import settings
+from src.database import engine
+from src.models.models import JobRuns, Jobs, JobStatusEnum
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobDefinition:
+    name: str
+    schedule: str
+    func: Callable[[], Optional[str]]
+    max_attempts: int = settings.JOB_MAX_ATTEMPTS
+    retry_delay_seconds: int = settings.JOB_RETRY_DELAY_SECONDS
+
+
+def next_fire_time(schedule: str, after: datetime) -> datetime:
+    # schedules are crontab strings in the server's local time, like every
+    # other naive datetime in the database
+    trigger = CronTrigger.from_crontab(schedule)
+    fire_time = trigger.get_next_fire_time(None, after.astimezone(trigger.timezone))
+    return fire_time.astimezone().replace(tzinfo=None)
+
+
+class JobRunner:
+    def __init__(
+        self,
+        jobs: List[JobDefinition],
+        poll_seconds: float = settings.JOB_POLL_SECONDS,
+        lease_seconds: int = settings.JOB_LEASE_SECONDS,
+    ) -> None:
+        self.jobs: Dict[str, JobDefinition] = {job.name: job for job in jobs}
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def sync(self) -> None:
+        # registers new jobs and reschedules the ones whose schedule changed
+        now = datetime.now()
+        with Session(engine) as session:
+            for job in self.jobs.values():
+                statement = pg_insert(Jobs).values(
+                    name=job.name,
+                    schedule=job.schedule,
+                    next_run_at=next_fire_time(job.schedule, now),
+                    max_attempts=job.max_attempts,
+                    retry_delay_seconds=job.retry_delay_seconds,
+                )
+                session.exec(
+                    statement.on_conflict_do_update(
+                        index_elements=[Jobs.name],
+                        set_={
+                            "schedule": statement.excluded.schedule,
+                            "max_attempts": statement.excluded.max_attempts,
+                            "retry_delay_seconds": statement.excluded.retry_delay_seconds,
+                            "next_run_at": case(
+                                (
+                                    Jobs.schedule != statement.excluded.schedule,
+                                    statement.excluded.next_run_at,
+                                ),
+                                else_=Jobs.next_run_at,
+                            ),
+                        },
+                    )
+                )
+            session.commit()
+
+    def abandon_runs(self, session: Session, names: List[str], now: datetime):
+        # runs still marked running belong to a worker whose lease expired
+        session.exec(
+            update(JobRuns)
+            .where(
+                JobRuns.job_name.in_(names),
+                JobRuns.status == JobStatusEnum.RUNNING,
+            )
+            .values(status=JobStatusEnum.LOST, finished_at=now)
+        )
+
+    def reap(self) -> None:
+        # a worker that died on a job's last attempt leaves it exhausted, so
+        # claim skips it; move it on to its next scheduled run instead
+        now = datetime.now()
+        with Session(engine) as session:
+            exhausted = session.exec(
+                select(Jobs.name, Jobs.schedule, Jobs.next_run_at)
+                .where(
+                    Jobs.name.in_(self.jobs),
+                    Jobs.attempts >= Jobs.max_attempts,
+                    or_(Jobs.locked_until == None, Jobs.locked_until < now),
+                )
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not exhausted:
+                return
+            for job in exhausted:
+                logger.warning("Job %s exhausted its attempts, skipping", job.name)
+                session.exec(
+                    update(Jobs)
+                    .where(Jobs.name == job.name)
+                    .values(
+                        next_run_at=next_fire_time(
+                            job.schedule,
+                            max(now, job.next_run_at) + timedelta(seconds=1),
+                        ),
+                        attempts=0,
+                        locked_by=None,
+                        locked_until=None,
+                        last_status=JobStatusEnum.FAILED,
+                    )
+                )
+            self.abandon_runs(session, [job.name for job in exhausted], now)
+            session.commit()
+
+    def claim(self) -> Optional[tuple]:
+        # a lease rather than a held row lock, so long jobs don't keep a
+        # transaction open; a worker that dies loses the lease when it expires
+        now = datetime.now()
+        with Session(engine) as session:
+            due = (
+                select(Jobs.name)
+                .where(
+                    Jobs.name.in_(self.jobs),
+                    Jobs.next_run_at <= now,
+                    Jobs.attempts < Jobs.max_attempts,
+                    or_(Jobs.locked_until == None, Jobs.locked_until < now),
+                )
+                .order_by(Jobs.next_run_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            job = session.exec(
+                update(Jobs)
+                .where(Jobs.name == due)
+                .values(
+                    locked_by=self.worker,
+                    locked_until=now + timedelta(seconds=self.lease_seconds),
+                    attempts=Jobs.attempts + 1,
+                )
+                .returning(Jobs.name, Jobs.attempts, Jobs.next_run_at)
+            ).first()
+            if job is None:
+                session.rollback()
+                return None
+
+            self.abandon_runs(session, [job.name], now)
+            run = JobRuns(job_name=job.name, worker=self.worker, attempt=job.attempts)
+            session.add(run)
+            session.commit()
+            return job, run.id
+
+    def heartbeat(self, name: str, done: Event) -> None:
+        # keeps extending the lease while the job runs, so a long job isn't
+        # claimed again by another worker
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                with Session(engine) as session:
+                    renewed = session.exec(
+                        update(Jobs)
+                        .where(Jobs.name == name, Jobs.locked_by == self.worker)
+                        .values(
+                            locked_until=datetime.now()
+                            + timedelta(seconds=self.lease_seconds)
+                        )
+                    ).rowcount
+                    session.commit()
+            except Exception:
+                logger.exception("Job %s heartbeat failed, retrying", name)
+                continue
+            if not renewed:
+                logger.warning("Job %s lost its lease to another worker", name)
+                return
+
+    def finish(self, job, run_id, result: Optional[str], error: Optional[str]) -> bool:
+        definition = self.jobs[job.name]
+        now = datetime.now()
+        succeeded = error is None
+        if succeeded or job.attempts >= definition.max_attempts:
+            next_run_at = next_fire_time(
+                definition.schedule, max(now, job.next_run_at) + timedelta(seconds=1)
+            )
+            attempts = 0
+        else:
+            next_run_at = now + timedelta(
+                seconds=definition.retry_delay_seconds * job.attempts
+            )
+            attempts = job.attempts
+        status = JobStatusEnum.SUCCEEDED if succeeded else JobStatusEnum.FAILED
+
+        with Session(engine) as session:
+            held = session.exec(
+                update(Jobs)
+                .where(Jobs.name == job.name, Jobs.locked_by == self.worker)
+                .values(
+                    next_run_at=next_run_at,
+                    attempts=attempts,
+                    locked_by=None,
+                    locked_until=None,
+                    last_run_at=now,
+                    last_status=status,
+                )
+            ).rowcount
+            if not held:
+                # another worker claimed the job after the lease expired; its
+                # schedule is theirs to update now
+                logger.warning("Job %s finished after losing its lease", job.name)
+                status = JobStatusEnum.LOST
+            session.exec(
+                update(JobRuns)
+                .where(JobRuns.id == run_id)
+                .values(status=status, finished_at=now, result=result, error=error)
+            )
+            session.commit()
+        return bool(held)
+
+    def run_pending(self) -> int:
+        self.reap()
+        ran = 0
+        while not self._stop.is_set():
+            claimed = self.claim()
+            if claimed is None:
+                return ran
+            job, run_id = claimed
+            result, error = None, None
+            done = Event()
+            heartbeat = Thread(
+                target=self.heartbeat,
+                args=(job.name, done),
+                name="job-heartbeat",
+                daemon=True,
+            )
+            heartbeat.start()
+            try:
+                result = self.jobs[job.name].func()
+                logger.info("Job %s: %s", job.name, result)
+            except Exception:
+                error = traceback.format_exc()
+                logger.exception("Job %s failed (attempt %s)", job.name, job.attempts)
+            finally:
+                done.set()
+                heartbeat.join()
+            self.finish(job, run_id, result, error)
+            ran += 1
+        return ran
+
+    def run_forever(self) -> None:
+        self.sync()
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception("Job runner failed, retrying")
+            self._stop.wait(self.poll_seconds)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self.run_forever, name="job-runner", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
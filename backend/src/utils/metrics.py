@@ -0,0 +1,30 @@
+from collections import defaultdict
+from threading import Lock
+from typing import Dict
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.gauges: Dict[str, float] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self.gauges[name] = value
+
+    def ratio(self, numerator: str, denominator: str) -> float:
+        with self._lock:
+            total = self.counters.get(denominator, 0)
+            return self.counters.get(numerator, 0) / total if total else 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"counters": dict(self.counters), "gauges": dict(self.gauges)}
+
+
+metrics = Metrics()
@@ -1,10 +1,21 @@
+import base64
+import json
 import math
 from dataclasses import dataclass
-from typing import Annotated, Generic, List, Type, TypeVar
+from datetime import datetime
+from enum import Enum
+from typing import Annotated, Generic, List, Optional, Type, TypeVar
+from uuid import UUID
 
+from fastapi import HTTPException, status
 from fastapi.params import Query
 from pydantic import BaseModel
-from sqlmodel import Session, SQLModel, func, or_, select
+from sqlalchemy import tuple_
+from sqlmodel import SQLModel, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import settings
+from src.utils.count_cache import CountCache
 
 T = TypeVar("T")
 
@@ -13,16 +24,29 @@ T = TypeVar("T")
 class Paginate:
     page: Annotated[int, Query(ge=1)] = 1
     per_page: Annotated[int, Query(ge=1, lte=100)] = 10
+    after: Annotated[Optional[str], Query()] = None
+    # defaults to counting offset pages only: a cursor walk has no page number
+    # and would pay for the same count on every page
+    include_total: Annotated[Optional[bool], Query()] = None
 
 
 M = TypeVar("M")
 
 
+class SortOrderEnum(str, Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+    def __str__(self):
+        return str(self.value)
+
+
 class PaginatorSchema(SQLModel):
-    total_count: int
-    total_pages: int
-    page: int
+    total_count: Optional[int] = None
+    total_pages: Optional[int] = None
+    page: Optional[int] = None
     per_page: int
+    next_cursor: Optional[str] = None
 
 
 class PaginationResponse(BaseModel, Generic[M]):
@@ -30,6 +54,36 @@ class PaginationResponse(BaseModel, Generic[M]):
     data: List[M]
 
 
+def encode_cursor(sort_key: str, value, id: UUID) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort_key, value, str(id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_column) -> tuple:
+    # the cursor names its sort column so it cannot be replayed under another
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_key, value, id = json.loads(raw)
+        if sort_key != sort_column.key:
+            raise ValueError(sort_key)
+        python_type = sort_column.type.python_type
+        if python_type is datetime:
+            value = datetime.fromisoformat(value)
+        else:
+            value = python_type(value)
+        return value, UUID(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid pagination cursor")
+
+
+count_cache = CountCache(
+    ttl=settings.PAGINATION_COUNT_CACHE_TTL,
+    max_users=settings.PAGINATION_COUNT_CACHE_USERS,
+    max_keys_per_user=settings.PAGINATION_COUNT_CACHE_KEYS_PER_USER,
+)
+
 Q = TypeVar("Q", bound="CommonBase")
 
 
@@ -38,40 +92,92 @@ class PaginatorQuery(Generic[Q]):
     async def paginate(
         table_name: Type[Q],
         input_data: Paginate,
-        session: Session,
+        session: AsyncSession,
         filters: tuple = (),
+        options: tuple = (),
+        owner_id: Optional[UUID] = None,
+        sort_column=None,
+        order: SortOrderEnum = SortOrderEnum.DESC,
     ):
-        offset = (input_data.page - 1) * input_data.per_page
+        if sort_column is None:
+            sort_column = table_name.created_at
+        descending = order == SortOrderEnum.DESC
 
         is_deleted_column = getattr(table_name, "is_deleted", None)
         if is_deleted_column is not None:
-            filters = (
-                *filters,
-                or_(is_deleted_column == False, is_deleted_column.is_(None)),
-            )
+            filters = (*filters, is_deleted_column == False)
+
+        include_total = input_data.include_total
+        if include_total is None:
+            include_total = not input_data.after
+
+        get_count_query = select(func.count()).select_from(table_name).where(*filters)
+        count = None
+        if include_total and owner_id is not None:
+            compiled = get_count_query.compile()
+            count_key = f"{compiled}|{sorted(compiled.params.items())}"
+            count = count_cache.get(owner_id, count_key)
+
+        # on offset pages the total rides along with the rows as a window count
+        windowed = include_total and count is None and not input_data.after
+        columns = (table_name, func.count().over()) if windowed else (table_name,)
+
         fetching_query = (
-            select(table_name)
+            select(*columns)
             .where(
                 *filters,
             )
-            .offset(offset)
-            .limit(input_data.per_page)
-            .order_by(table_name.created_at.desc())
+            .limit(input_data.per_page + 1)
+            .order_by(
+                *(
+                    (sort_column.desc(), table_name.id.desc())
+                    if descending
+                    else (sort_column.asc(), table_name.id.asc())
+                )
+            )
+            .options(*options)
         )
+        if input_data.after:
+            position = tuple_(sort_column, table_name.id)
+            cursor = tuple_(*decode_cursor(input_data.after, sort_column))
+            fetching_query = fetching_query.where(
+                position < cursor if descending else position > cursor
+            )
+        else:
+            fetching_query = fetching_query.offset(
+                (input_data.page - 1) * input_data.per_page
+            )
 
-        total_data = session.exec(fetching_query).all()
+        total_data = (await session.exec(fetching_query)).all()
+        if windowed:
+            if total_data:
+                count = total_data[0][1]
+            total_data = [row[0] for row in total_data]
+
+        next_cursor = None
+        if len(total_data) > input_data.per_page:
+            total_data = total_data[: input_data.per_page]
+            last = total_data[-1]
+            next_cursor = encode_cursor(
+                sort_column.key, getattr(last, sort_column.key), last.id
+            )
 
-        get_count_query = select(func.count()).select_from(table_name).where(*filters)
-        count = session.exec(get_count_query).one()
+        if include_total and count is None:
+            count = (await session.exec(get_count_query)).one()
+        if include_total and owner_id is not None:
+            count_cache.set(owner_id, count_key, count)
 
-        page_page_total: int = math.ceil(count / input_data.per_page)
+        page_page_total: Optional[int] = (
+            math.ceil(count / input_data.per_page) if count is not None else None
+        )
 
         return (
             PaginatorSchema(
                 total_count=count,
                 total_pages=page_page_total,
-                page=input_data.page,
+                page=None if input_data.after else input_data.page,
                 per_page=input_data.per_page,
+                next_cursor=next_cursor,
             ),
             total_data,
         )
@@ -0,0 +1,160 @@
+import json
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from src.config import settings
+from src.database import engine
+
+PARENT = "transactions"
+DEFAULT_PARTITION = f"{PARENT}_default"
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month:%Y%m}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    try:
+        return datetime.strptime(name, f"{PARENT}_p%Y%m").date()
+    except ValueError:
+        return None
+
+
+def is_partitioned(session: Session) -> bool:
+    return bool(
+        session.exec(
+            text(
+                "SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass(:parent)"
+            ),
+            params={"parent": PARENT},
+        ).first()
+    )
+
+
+def list_partitions(session: Session) -> List[str]:
+    return (
+        session.exec(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:parent) ORDER BY c.relname"
+            ),
+            params={"parent": PARENT},
+        )
+        .scalars()
+        .all()
+    )
+
+
+def create_partition(session: Session, month: date) -> str:
+    # built standalone and attached, so rows that already fell into the
+    # default partition for this month are moved instead of blocking creation
+    name = partition_name(month)
+    bounds = {"start": month, "end": add_months(month, 1)}
+    session.exec(
+        text(
+            f"CREATE TABLE {name} "
+            f"(LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    # lets ATTACH skip its validation scan of the new table
+    session.exec(
+        text(
+            f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds CHECK "
+            f"(transaction_time >= '{bounds['start']}' "
+            f"AND transaction_time < '{bounds['end']}')"
+        )
+    )
+    session.exec(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE transaction_time >= :start AND transaction_time < :end "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        ),
+        params=bounds,
+    )
+    session.exec(
+        text(
+            f"ALTER TABLE {PARENT} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+        )
+    )
+    session.exec(text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds"))
+    return name
+
+
+def ensure_partitions(
+    months_ahead: int = settings.TRANSACTION_PARTITIONS_AHEAD,
+) -> List[str]:
+    with Session(engine) as session:
+        # every worker runs this on startup; one at a time is enough
+        session.exec(
+            text("SELECT pg_advisory_xact_lock(hashtext(:parent))"),
+            params={"parent": PARENT},
+        )
+        if not is_partitioned(session):
+            return []
+
+        existing = set(list_partitions(session))
+        current = month_start(date.today())
+        months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+        months.update(
+            session.exec(
+                text(
+                    "SELECT DISTINCT date_trunc('month', transaction_time)::date "
+                    f"FROM {DEFAULT_PARTITION}"
+                )
+            ).scalars()
+        )
+
+        created = [
+            create_partition(session, month)
+            for month in sorted(months)
+            if partition_name(month) not in existing
+        ]
+        session.commit()
+        return created
+
+
+def detach_partitions(before: date) -> List[str]:
+    # detaching only touches the catalog; the table stays behind for archival
+    with Session(engine) as session:
+        session.exec(text("SET LOCAL lock_timeout = '5s'"))
+        detached = []
+        for name in list_partitions(session):
+            month = partition_month(name)
+            if month is None or add_months(month, 1) > before:
+                continue
+            session.exec(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+            detached.append(name)
+        session.commit()
+        return detached
+
+
+def scanned_partitions(query) -> List[str]:
+    with Session(engine) as session:
+        compiled = query.compile(engine, compile_kwargs={"literal_binds": True})
+        plan = session.exec(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar_one()
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    relations, nodes = set(), [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Relation Name" in node:
+            relations.add(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+    return sorted(relations)
@@ -0,0 +1,63 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from src.utils.metrics import metrics
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int, workers: int, max_pending: int) -> None:
+        # pinning min/max to the configured cost makes passlib flag every
+        # hash made with a different cost for rehashing on the next login
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hasher"
+        )
+
+    def _report(self) -> None:
+        metrics.gauge("password_hasher.in_flight", self.pending)
+        metrics.gauge(
+            "password_hasher.queue_depth", max(0, self.pending - self.workers)
+        )
+
+    async def _run(self, func, *args):
+        if self.pending >= self.max_pending:
+            metrics.incr("password_hasher.rejected")
+            raise HTTPException(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                "Too many authentication requests, try again later",
+            )
+
+        self.pending += 1
+        self._report()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+            self._report()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(
+        self, password: str, stored_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        return await self._run(
+            self.context.verify_and_update, password, stored_password
+        )
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,88 @@
+import logging
+import select
+import time
+from threading import Event, Thread
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class PgListener:
+    def __init__(self, engine: Engine, resync_seconds: int = 600) -> None:
+        self.engine = engine
+        self.resync_seconds = resync_seconds
+        self.handlers: Dict[str, Callable[[str], None]] = {}
+        self.on_sync: List[Callable[[], None]] = []
+        self.on_lost: List[Callable[[], None]] = []
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def subscribe(
+        self,
+        channel: str,
+        handler: Callable[[str], None],
+        on_sync: Optional[Callable[[], None]] = None,
+        on_lost: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.handlers[channel] = handler
+        if on_sync:
+            self.on_sync.append(on_sync)
+        if on_lost:
+            self.on_lost.append(on_lost)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name="pg-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _connect(self):
+        cargs, cparams = self.engine.dialect.create_connect_args(self.engine.url)
+        connection = self.engine.dialect.connect(*cargs, **cparams)
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            for channel in self.handlers:
+                cursor.execute(f'LISTEN "{channel}"')
+        return connection
+
+    def _sync(self) -> None:
+        for callback in self.on_sync:
+            callback()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                self._sync()
+                next_sync = time.monotonic() + self.resync_seconds
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], 1.0) != ([], [], []):
+                        connection.poll()
+                        while connection.notifies:
+                            notify = connection.notifies.pop(0)
+                            handler = self.handlers.get(notify.channel)
+                            if handler:
+                                handler(notify.payload)
+                    if time.monotonic() >= next_sync:
+                        self._sync()
+                        next_sync = time.monotonic() + self.resync_seconds
+            except Exception:
+                logger.exception("Postgres listener failed, reconnecting")
+                for callback in self.on_lost:
+                    callback()
+                self._stop.wait(5)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
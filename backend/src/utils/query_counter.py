@@ -0,0 +1,49 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Tuple
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.utils.metrics import metrics
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+
+# every open count_queries() block counts, so a test can wrap a request in
+# its own counter while the middleware counts the same queries
+_active_counters: ContextVar[Tuple[QueryCounter, ...]] = ContextVar(
+    "query_counters", default=()
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    for counter in _active_counters.get():
+        counter.count += 1
+
+
+@contextmanager
+def count_queries():
+    counter = QueryCounter()
+    token = _active_counters.set(_active_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _active_counters.reset(token)
+
+
+def get_query_counter():
+    async def handle_middleware(req: Request, call_next):
+        with count_queries() as counter:
+            response = await call_next(req)
+        metrics.incr("db.queries", counter.count)
+        metrics.incr("db.requests")
+        response.headers["X-Query-Count"] = str(counter.count)
+        return response
+
+    return handle_middleware
@@ -0,0 +1,181 @@
+import csv
+import io
+import json
+from collections import deque
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, List, Optional, Sequence, Tuple, Union
+
+from fastapi import HTTPException, Request, status
+
+from src.config import settings
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CSV_TYPES = ("text/csv", "application/csv")
+
+
+class RecordFormatEnum(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+    @property
+    def media_type(self) -> str:
+        return CSV_TYPES[0] if self == RecordFormatEnum.CSV else NDJSON_TYPES[0]
+
+
+async def iter_lines(
+    request: Request, max_line_bytes: int
+) -> AsyncIterator[Optional[str]]:
+    # an overlong line comes out as None and the rest of it is dropped, so a
+    # body without newlines can't grow the buffer without bound
+    buffer = b""
+    overflow = False
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if overflow:
+                overflow = False
+            elif len(line) > max_line_bytes:
+                yield None
+            else:
+                yield line.decode(errors="replace").rstrip("\r")
+        if len(buffer) > max_line_bytes:
+            if not overflow:
+                yield None
+            overflow = True
+            buffer = b""
+    if buffer and not overflow:
+        yield buffer.decode(errors="replace").rstrip("\r")
+
+
+class LineFeed:
+    # the input of one long-lived csv.reader, refilled a record at a time
+    def __init__(self) -> None:
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def iter_csv_records(
+    lines: AsyncIterator[Optional[str]], max_line_bytes: int
+) -> AsyncIterator[Union[List[str], Exception]]:
+    # a record ends on the physical line that closes its last quote, so quoted
+    # fields may hold newlines; the reader only sees complete records
+    feed = LineFeed()
+    reader = csv.reader(feed)
+    pending: List[str] = []
+    size = 0
+    quoted = False
+    too_long = False
+    async for line in lines:
+        if line is None:
+            yield ValueError(f"Line is longer than {max_line_bytes} bytes")
+            pending, size, quoted, too_long = [], 0, False, False
+            continue
+        if not quoted and not line.strip():
+            continue
+
+        quoted ^= line.count('"') % 2 == 1
+        size += len(line) + 1
+        too_long = too_long or size > max_line_bytes
+        if not too_long:
+            pending.append(line + "\n")
+        if quoted:
+            continue
+
+        if too_long:
+            yield ValueError(f"Row is longer than {max_line_bytes} bytes")
+        else:
+            feed.lines.extend(pending)
+            try:
+                yield next(reader)
+            except csv.Error as e:
+                feed.lines.clear()
+                yield ValueError(str(e))
+        pending, size, too_long = [], 0, False
+
+    if quoted:
+        yield ValueError("Quoted field is never closed")
+
+
+async def iter_records(
+    request: Request, max_line_bytes: int = settings.BULK_TRANSACTIONS_MAX_LINE_BYTES
+) -> AsyncIterator[Tuple[int, Union[dict, Exception]]]:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in NDJSON_TYPES + CSV_TYPES:
+        raise HTTPException(
+            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            "Send the rows as NDJSON (application/x-ndjson) or CSV (text/csv)",
+        )
+
+    lines = iter_lines(request, max_line_bytes)
+    if content_type in NDJSON_TYPES:
+        row_number = 0
+        async for line in lines:
+            if line is not None and not line.strip():
+                continue
+            row_number += 1
+            try:
+                if line is None:
+                    raise ValueError(f"Line is longer than {max_line_bytes} bytes")
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("Each line must be a JSON object")
+            except ValueError as e:
+                yield row_number, e
+                continue
+            yield row_number, record
+        return
+
+    header = None
+    row_number = 0
+    async for values in iter_csv_records(lines, max_line_bytes):
+        if header is None:
+            if isinstance(values, Exception):
+                raise HTTPException(
+                    status.HTTP_400_BAD_REQUEST, f"Invalid CSV header: {values}"
+                )
+            header = values
+            continue
+
+        row_number += 1
+        if not isinstance(values, Exception) and len(values) != len(header):
+            values = ValueError(f"Expected {len(header)} columns, got {len(values)}")
+        if isinstance(values, Exception):
+            yield row_number, values
+            continue
+
+        yield row_number, {key: value or None for key, value in zip(header, values)}
+
+
+def serialize(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+async def encode_records(
+    records: AsyncIterator[dict], columns: Sequence[str], format: RecordFormatEnum
+) -> AsyncIterator[str]:
+    if format == RecordFormatEnum.NDJSON:
+        async for record in records:
+            yield json.dumps(record, default=serialize) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    async for record in records:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(
+            "" if record[column] is None else serialize(record[column])
+            for column in columns
+        )
+        yield buffer.getvalue()
@@ -0,0 +1,93 @@
+import os
+import uuid
+
+import pytest
+
+# the suite runs against its own database; it must exist but may be empty
+os.environ["DB_URL"] = os.environ.get(
+    "TEST_DB_URL", "postgresql://postgres@localhost:5432/wallet_test"
+)
+os.environ.pop("ASYNC_DB_URL", None)
+os.environ["JOB_RUNNER_IN_PROCESS"] = "false"
+os.environ.setdefault("PORT", "5001")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("EXPIRE_MINUTES", "60")
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from main import app  # noqa: E402
+from src.database import engine  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def client(anyio_backend):
+    try:
+        engine.connect().close()
+    except OperationalError as e:
+        pytest.skip(f"Test database unavailable: {e.orig}")
+
+    # one lifespan and event loop for the whole session, so the async
+    # connection pool is never shared across loops
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            yield client
+
+
+def ok(response, status_code=200):
+    assert response.status_code == status_code, response.text
+    return response.json()["data"]
+
+
+async def create_user(client):
+    email = f"{uuid.uuid4().hex}@example.com"
+    credentials = {"email": email, "password": "password"}
+    ok(
+        await client.post("/api/v1/auth/signup", json={"name": "test", **credentials}),
+        201,
+    )
+    token = ok(await client.post("/api/v1/auth/signin", json=credentials))
+    headers = {"Authorization": f"Bearer {token['access_token']}"}
+
+    account = ok(
+        await client.post(
+            "/api/v1/accounts",
+            json={"name": f"bank {email}", "type": "bank", "balance": 0},
+            headers=headers,
+        ),
+        201,
+    )
+    category = ok(
+        await client.post(
+            "/api/v1/categories",
+            json={"name": f"food {email}", "description": "food"},
+            headers=headers,
+        ),
+        201,
+    )
+    return {"headers": headers, "account": account, "category": category}
+
+
+def expense(user, amount=10.0, **fields):
+    return {
+        "amount": amount,
+        "type": "expense",
+        "description": "test",
+        "category_id": user["category"]["id"],
+        "account_id": user["account"]["id"],
+        **fields,
+    }
+
+
+@pytest.fixture
+async def user(client):
+    return await create_user(client)
@@ -0,0 +1,81 @@
+import pytest
+from conftest import expense, ok
+
+from src.controllers.budget_controller import BUDGETS_CHANNEL
+from src.database import pg_listener
+
+pytestmark = pytest.mark.anyio
+
+BUDGET = {
+    "limit": 1_000,
+    "start_date": "2020-01-01T00:00:00",
+    "end_date": "2099-01-01T00:00:00",
+}
+
+
+async def budget_amounts(client, user):
+    budgets = ok(await client.get("/api/v1/budgets", headers=user["headers"]))
+    return {budget["type"]: budget["amount"] for budget in budgets}
+
+
+@pytest.fixture
+def slow_notify(monkeypatch):
+    # the budgets_changed NOTIFY has not been delivered yet
+    monkeypatch.setitem(pg_listener.handlers, BUDGETS_CHANNEL, lambda payload: None)
+
+
+async def test_new_budgets_are_charged_by_the_next_expense(client, user, slow_notify):
+    # the first expense caches the user's budgets: none yet
+    ok(
+        await client.post(
+            "/api/v1/transactions", json=expense(user, 10), headers=user["headers"]
+        )
+    )
+    ok(await client.post("/api/v1/budgets", json=BUDGET, headers=user["headers"]), 201)
+    ok(
+        await client.post(
+            f"/api/v1/budgets/{user['account']['id']}",
+            json=BUDGET,
+            headers=user["headers"],
+        ),
+        201,
+    )
+    ok(
+        await client.post(
+            "/api/v1/transactions", json=expense(user, 5), headers=user["headers"]
+        )
+    )
+
+    assert await budget_amounts(client, user) == {"overall": 15, "account": 15}
+
+
+async def test_updated_budget_window_is_charged_by_the_next_expense(
+    client, user, slow_notify
+):
+    budget = ok(
+        await client.post(
+            "/api/v1/budgets",
+            json={**BUDGET, "end_date": "2021-01-01T00:00:00"},
+            headers=user["headers"],
+        ),
+        201,
+    )
+    ok(
+        await client.post(
+            "/api/v1/transactions", json=expense(user, 10), headers=user["headers"]
+        )
+    )
+    ok(
+        await client.patch(
+            f"/api/v1/budgets/{budget['id']}",
+            json={"end_date": BUDGET["end_date"]},
+            headers=user["headers"],
+        )
+    )
+    ok(
+        await client.post(
+            "/api/v1/transactions", json=expense(user, 5), headers=user["headers"]
+        )
+    )
+
+    assert await budget_amounts(client, user) == {"overall": 15}
@@ -0,0 +1,167 @@
+import math
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.utils.budget_forecast import forecast_budgets
+
+NOW = datetime(2026, 6, 15, 12, 0, 0)
+
+
+def forecast_one_by_one(
+    starts, ends, limits, spend_budget, spend_age, spend_amount, now, lookback_days
+):
+    # the per-budget loop forecast_budgets replaces, kept as its reference
+    series = defaultdict(list)
+    for budget, age, amount in zip(spend_budget, spend_age, spend_amount):
+        series[budget].append((age, amount))
+
+    forecasts = []
+    for budget, (start, end, limit) in enumerate(zip(starts, ends, limits)):
+        period = max((end - start) / timedelta(days=1), 1)
+        elapsed = min(max((min(now, end) - start) / timedelta(days=1), 1), period)
+        lookback = min(elapsed, lookback_days)
+        spent = sum(amount for _, amount in series[budget])
+        recent = sum(
+            amount for age, amount in series[budget] if age < math.ceil(lookback)
+        )
+        burn_rate = recent / lookback
+        since = max(now, start)
+        remaining = max((end - since) / timedelta(days=1), 0)
+        days_to_limit = (limit - spent) / burn_rate if burn_rate > 0 else math.inf
+        crosses = spent < limit and days_to_limit <= remaining
+        forecasts.append(
+            {
+                "spent": spent,
+                "burn_rate": burn_rate,
+                "projected_spend": spent + burn_rate * remaining,
+                "days_remaining": remaining,
+                "over_limit": spent >= limit,
+                "projected_limit_date": (
+                    since + timedelta(seconds=int(days_to_limit * 86_400))
+                    if crosses
+                    else None
+                ),
+            }
+        )
+    return forecasts
+
+
+def forecast(budgets, spend=(), lookback_days=30):
+    spend_budget, spend_age, spend_amount = zip(*spend) if spend else ((), (), ())
+    return forecast_budgets(
+        starts=[start for start, _, _ in budgets],
+        ends=[end for _, end, _ in budgets],
+        limits=[limit for _, _, limit in budgets],
+        spend_budget=spend_budget,
+        spend_age=spend_age,
+        spend_amount=spend_amount,
+        now=NOW,
+        lookback_days=lookback_days,
+    )
+
+
+def test_no_budgets():
+    assert forecast([]) == []
+
+
+def test_no_spend():
+    [result] = forecast([(NOW - timedelta(days=10), NOW + timedelta(days=20), 100)])
+    assert result == {
+        "spent": 0,
+        "burn_rate": 0,
+        "projected_spend": 0,
+        "days_remaining": 20,
+        "over_limit": False,
+        "projected_limit_date": None,
+    }
+
+
+def test_burn_rate_projects_limit_date():
+    budget = (NOW - timedelta(days=10), NOW + timedelta(days=20), 100)
+    [result] = forecast([budget], spend=[(0, age, 5) for age in range(10)])
+    assert result["spent"] == 50
+    assert result["burn_rate"] == 5
+    assert result["projected_spend"] == 150
+    assert result["projected_limit_date"] == NOW + timedelta(days=10)
+
+
+def test_future_budget_counts_days_from_its_start():
+    start = NOW + timedelta(days=5)
+    [result] = forecast([(start, start + timedelta(days=30), 100)])
+    assert result["days_remaining"] == 30
+    assert result["projected_spend"] == 0
+    assert result["projected_limit_date"] is None
+
+
+def test_ended_budget_has_no_days_remaining():
+    budget = (NOW - timedelta(days=40), NOW - timedelta(days=10), 100)
+    [result] = forecast([budget], spend=[(0, 15, 120)])
+    assert result["days_remaining"] == 0
+    assert result["over_limit"] is True
+
+
+def random_inputs(budgets, spend_per_budget):
+    rng = random.Random(7)
+    starts, ends, limits = [], [], []
+    spend_budget, spend_age, spend_amount = [], [], []
+    for budget in range(budgets):
+        start = NOW + timedelta(days=rng.randint(-90, 10), hours=rng.randint(0, 23))
+        end = start + timedelta(days=rng.randint(1, 120))
+        starts.append(start)
+        ends.append(end)
+        limits.append(float(rng.randint(50, 5_000)))
+        elapsed = max((min(NOW, end) - start).days, 0)
+        for age in rng.sample(range(elapsed + 1), min(spend_per_budget, elapsed + 1)):
+            spend_budget.append(budget)
+            spend_age.append(age)
+            spend_amount.append(round(rng.uniform(1, 200), 2))
+    return dict(
+        starts=starts,
+        ends=ends,
+        limits=limits,
+        spend_budget=spend_budget,
+        spend_age=spend_age,
+        spend_amount=spend_amount,
+        now=NOW,
+        lookback_days=30,
+    )
+
+
+def assert_same(vectorized, looped):
+    assert len(vectorized) == len(looped)
+    for fast, slow in zip(vectorized, looped):
+        for key in ("spent", "burn_rate", "projected_spend", "days_remaining"):
+            assert fast[key] == pytest.approx(slow[key])
+        assert fast["over_limit"] == slow["over_limit"]
+        if slow["projected_limit_date"] is None:
+            assert fast["projected_limit_date"] is None
+        else:
+            gap = fast["projected_limit_date"] - slow["projected_limit_date"]
+            assert abs(gap) <= timedelta(seconds=1)
+
+
+def test_matches_per_budget_loop():
+    inputs = random_inputs(budgets=500, spend_per_budget=20)
+    assert_same(forecast_budgets(**inputs), forecast_one_by_one(**inputs))
+
+
+def best_of(runs, func, **inputs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func(**inputs)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+@pytest.mark.benchmark
+def test_benchmark_against_per_budget_loop():
+    inputs = random_inputs(budgets=10_000, spend_per_budget=30)
+    vectorized_seconds, vectorized = best_of(3, forecast_budgets, **inputs)
+    looped_seconds, looped = best_of(3, forecast_one_by_one, **inputs)
+    assert_same(vectorized, looped)
+    assert vectorized_seconds < looped_seconds
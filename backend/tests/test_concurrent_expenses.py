@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+import anyio
+import pytest
+from conftest import expense, ok
+
+from src.controllers import transactions_controller
+
+pytestmark = pytest.mark.anyio
+
+REQUESTS = 40
+
+BUDGET = {
+    "limit": 1_000_000,
+    "start_date": "2020-01-01T00:00:00",
+    "end_date": "2099-01-01T00:00:00",
+}
+
+
+async def balance_and_budgets(client, user):
+    account = ok(
+        await client.get(
+            f"/api/v1/accounts/{user['account']['id']}", headers=user["headers"]
+        )
+    )
+    budgets = ok(await client.get("/api/v1/budgets", headers=user["headers"]))
+    return account["balance"], {budget["type"]: budget["amount"] for budget in budgets}
+
+
+async def test_concurrent_expenses_keep_totals(client, user):
+    ok(await client.post("/api/v1/budgets", json=BUDGET, headers=user["headers"]), 201)
+    ok(
+        await client.post(
+            f"/api/v1/budgets/{user['account']['id']}",
+            json=BUDGET,
+            headers=user["headers"],
+        ),
+        201,
+    )
+
+    amounts = [float(amount) for amount in range(1, REQUESTS + 1)]
+    responses = await asyncio.gather(
+        *(
+            client.post(
+                "/api/v1/transactions",
+                json=expense(user, amount),
+                headers=user["headers"],
+            )
+            for amount in amounts
+        )
+    )
+    for response in responses:
+        ok(response)
+
+    balance, budgets = await balance_and_budgets(client, user)
+    assert balance == -sum(amounts)
+    assert budgets == {"overall": sum(amounts), "account": sum(amounts)}
+
+
+async def test_concurrent_bulk_and_single_expenses_keep_totals(client, user):
+    ok(await client.post("/api/v1/budgets", json=BUDGET, headers=user["headers"]), 201)
+
+    bulk_amounts = [2.5] * 100
+    body = "\n".join(json.dumps(expense(user, amount)) for amount in bulk_amounts)
+    single_amounts = [float(amount) for amount in range(1, REQUESTS + 1)]
+    responses = await asyncio.gather(
+        *(
+            client.post(
+                "/api/v1/transactions/bulk",
+                content=body,
+                headers={**user["headers"], "Content-Type": "application/x-ndjson"},
+            )
+            for _ in range(3)
+        ),
+        *(
+            client.post(
+                "/api/v1/transactions",
+                json=expense(user, amount),
+                headers=user["headers"],
+            )
+            for amount in single_amounts
+        ),
+    )
+    for response in responses:
+        ok(response)
+
+    total = 3 * sum(bulk_amounts) + sum(single_amounts)
+    balance, budgets = await balance_and_budgets(client, user)
+    assert balance == -total
+    assert budgets == {"overall": total}
+
+
+async def test_bulk_commits_each_chunk(client, user, monkeypatch):
+    monkeypatch.setattr(transactions_controller, "BULK_CHUNK_SIZE", 10)
+
+    async def body():
+        for _ in range(10):
+            yield (json.dumps(expense(user, 1.0)) + "\n").encode()
+        # the first chunk is visible while the upload is still streaming
+        with anyio.fail_after(5):
+            while (await balance_and_budgets(client, user))[0] != -10:
+                await anyio.sleep(0.01)
+        for _ in range(15):
+            yield (json.dumps(expense(user, 1.0)) + "\n").encode()
+
+    result = ok(
+        await client.post(
+            "/api/v1/transactions/bulk",
+            content=body(),
+            headers={**user["headers"], "Content-Type": "application/x-ndjson"},
+        )
+    )
+
+    assert result["created"] == 25
+    assert (await balance_and_budgets(client, user))[0] == -25
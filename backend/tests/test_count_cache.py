@@ -0,0 +1,24 @@
+from src.utils.count_cache import CountCache
+
+
+def test_keeps_recently_used_keys_per_user():
+    cache = CountCache(ttl=60, max_users=10, max_keys_per_user=2)
+    cache.set("user", "a", 1)
+    cache.set("user", "b", 2)
+    assert cache.get("user", "a") == 1
+
+    cache.set("user", "c", 3)
+
+    assert cache.get("user", "b") is None
+    assert cache.get("user", "a") == 1
+    assert cache.get("user", "c") == 3
+
+
+def test_keys_of_other_users_are_kept():
+    cache = CountCache(ttl=60, max_users=10, max_keys_per_user=1)
+    cache.set("user", "a", 1)
+    cache.set("other", "a", 2)
+    cache.set("other", "b", 3)
+
+    assert cache.get("user", "a") == 1
+    assert cache.get("other", "a") is None
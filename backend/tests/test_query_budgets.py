@@ -0,0 +1,180 @@
+import json
+
+import pytest
+from conftest import expense, ok
+
+from src.utils.query_counter import count_queries
+
+pytestmark = pytest.mark.anyio
+
+OVERALL_BUDGET = {
+    "limit": 1_000,
+    "start_date": "2020-01-01T00:00:00",
+    "end_date": "2099-01-01T00:00:00",
+}
+
+
+async def queries(request):
+    with count_queries() as counter:
+        response = await request
+    ok(response)
+    return counter.count
+
+
+async def test_counters_nest(client, user):
+    with count_queries() as outer:
+        with count_queries() as inner:
+            response = await client.get("/api/v1/transactions", headers=user["headers"])
+    assert outer.count == inner.count == int(response.headers["X-Query-Count"]) > 0
+
+
+async def test_list_does_not_grow_with_page_size(client, user):
+    ok(
+        await client.post(
+            "/api/v1/transactions", json=expense(user), headers=user["headers"]
+        )
+    )
+    one = await queries(client.get("/api/v1/transactions", headers=user["headers"]))
+
+    for _ in range(9):
+        ok(
+            await client.post(
+                "/api/v1/transactions", json=expense(user), headers=user["headers"]
+            )
+        )
+    ten = await queries(client.get("/api/v1/transactions", headers=user["headers"]))
+
+    assert one == ten <= 2
+
+
+async def test_cursor_pages_skip_the_count(client, user):
+    for _ in range(3):
+        ok(
+            await client.post(
+                "/api/v1/transactions", json=expense(user), headers=user["headers"]
+            )
+        )
+    first = await client.get(
+        "/api/v1/transactions", params={"per_page": 2}, headers=user["headers"]
+    )
+    params = {"per_page": 2, "after": first.json()["pagination"]["next_cursor"]}
+
+    with count_queries() as counter:
+        response = await client.get(
+            "/api/v1/transactions", params=params, headers=user["headers"]
+        )
+    counted = await queries(
+        client.get(
+            "/api/v1/transactions",
+            params={**params, "include_total": "true"},
+            headers=user["headers"],
+        )
+    )
+
+    pagination = response.json()["pagination"]
+    assert pagination["page"] is None
+    assert pagination["total_count"] is None
+    assert pagination["total_pages"] is None
+    assert counted == counter.count + 1
+
+
+async def test_categories_do_not_grow_with_page_size(client, user):
+    one = await queries(client.get("/api/v1/categories", headers=user["headers"]))
+
+    for index in range(9):
+        category = ok(
+            await client.post(
+                "/api/v1/categories",
+                json={
+                    "name": f"{index} {user['category']['name']}",
+                    "description": "d",
+                },
+                headers=user["headers"],
+            ),
+            201,
+        )
+        ok(
+            await client.post(
+                "/api/v1/sub_categories",
+                json={
+                    "name": f"sub {category['name']}",
+                    "description": "d",
+                    "category_id": category["id"],
+                },
+                headers=user["headers"],
+            ),
+            201,
+        )
+    ten = await queries(client.get("/api/v1/categories", headers=user["headers"]))
+
+    # the page, then every page's sub-categories in one selectin query
+    assert one == ten <= 2
+
+
+async def test_create_transaction(client, user):
+    ok(
+        await client.post(
+            "/api/v1/budgets", json=OVERALL_BUDGET, headers=user["headers"]
+        ),
+        201,
+    )
+    ok(
+        await client.post(
+            "/api/v1/transactions", json=expense(user), headers=user["headers"]
+        )
+    )
+
+    # a fixed number of statements, whatever the user's history
+    assert (
+        await queries(
+            client.post(
+                "/api/v1/transactions", json=expense(user), headers=user["headers"]
+            )
+        )
+        <= 6
+    )
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"group_by": ["category", "account"]},
+        {"group_by": ["sub_category"], "interval": "month"},
+    ],
+)
+async def test_report_is_one_query(client, user, params):
+    ok(
+        await client.post(
+            "/api/v1/transactions", json=expense(user), headers=user["headers"]
+        )
+    )
+    assert (
+        await queries(
+            client.get(
+                "/api/v1/transactions/report", params=params, headers=user["headers"]
+            )
+        )
+        == 1
+    )
+
+
+async def test_bulk_does_not_grow_with_rows(client, user):
+    headers = {**user["headers"], "Content-Type": "application/x-ndjson"}
+    # loads the user's budgets into the cache
+    ok(
+        await client.post(
+            "/api/v1/transactions", json=expense(user), headers=user["headers"]
+        )
+    )
+
+    def body(rows):
+        return "\n".join(json.dumps(expense(user)) for _ in range(rows))
+
+    few = await queries(
+        client.post("/api/v1/transactions/bulk", content=body(5), headers=headers)
+    )
+    many = await queries(
+        client.post("/api/v1/transactions/bulk", content=body(200), headers=headers)
+    )
+    assert few == many <= 4
@@ -0,0 +1,161 @@
+import json
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from conftest import create_user, expense, ok
+from sqlalchemy import event, text
+
+from src.database import async_engine, engine
+
+pytestmark = pytest.mark.anyio
+
+YESTERDAY = (datetime.now() - timedelta(days=1)).isoformat(timespec="seconds")
+
+INDEX_SCANS = ("Index Scan", "Index Only Scan")
+
+
+@contextmanager
+def captured_selects():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+
+async def index_family(conn, index: str) -> set:
+    # on a partitioned table the plan names each partition's own index
+    partitions = await conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "WHERE parent.relname = :index"
+        ),
+        {"index": index},
+    )
+    return {index, *partitions.scalars()}
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+async def scanned_indexes(statement, parameters) -> list:
+    # the other tables only hold a few rows per test user, so sequential and
+    # bitmap scans are ruled out to check the index fits the filter and order
+    async with async_engine.connect() as conn:
+        await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        await conn.exec_driver_sql("SET LOCAL enable_bitmapscan = off")
+        plan = (
+            await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        ).scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return [
+        node["Index Name"]
+        for node in plan_nodes(plan[0]["Plan"])
+        if node["Node Type"] in INDEX_SCANS
+    ]
+
+
+@pytest.fixture(scope="module")
+async def history(client):
+    # an hourly expense for the last ~2 years, so the planner sees a user
+    # with real history instead of a handful of rows
+    user = await create_user(client)
+    ok(
+        await client.post(
+            "/api/v1/transactions", json=expense(user), headers=user["headers"]
+        )
+    )
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO transactions (id, is_active, is_deleted, created_at,"
+                " user_id, account_id, category_id, amount, type, description,"
+                " transaction_time) "
+                "SELECT gen_random_uuid(), true, false, at, user_id, account_id,"
+                " category_id, amount, type, description, at "
+                "FROM transactions, generate_series(1, 20000) AS hour,"
+                " LATERAL (SELECT localtimestamp - hour * interval '1 hour' AS at) AS t "
+                "WHERE user_id = :user_id"
+            ),
+            {"user_id": user["account"]["user_id"]},
+        )
+        conn.execute(text("ANALYZE"))
+    return user
+
+
+@pytest.mark.parametrize(
+    "path, params, index",
+    [
+        ("/api/v1/transactions", {}, "ix_transactions_user_id_transaction_time_live"),
+        (
+            "/api/v1/transactions",
+            {"include_total": "false"},
+            "ix_transactions_user_id_transaction_time_live",
+        ),
+        (
+            "/api/v1/transactions",
+            {"sort": "amount"},
+            "ix_transactions_user_id_amount_live",
+        ),
+        (
+            "/api/v1/transactions/report",
+            {"start_date": YESTERDAY},
+            "ix_transactions_user_id_transaction_time_live",
+        ),
+        (
+            "/api/v1/transactions/report",
+            {
+                "start_date": YESTERDAY,
+                "group_by": ["sub_category", "account"],
+                "interval": "day",
+            },
+            "ix_transactions_user_id_transaction_time_live",
+        ),
+        ("/api/v1/accounts", {}, "ix_accounts_user_id_created_at_live"),
+        ("/api/v1/categories", {}, "ix_categories_user_id_created_at_live"),
+        ("/api/v1/budgets", {}, "ix_budgets_user_id_created_at_live"),
+        ("/api/v1/notifications", {}, "ix_notifications_user_id_created_at_live"),
+    ],
+)
+async def test_reads_use_live_rows_index(client, history, path, params, index):
+    with captured_selects() as statements:
+        ok(await client.get(path, params=params, headers=history["headers"]))
+    # the page or report query comes first, then any relationship loaders
+    statement, parameters = statements[0]
+
+    async with async_engine.connect() as conn:
+        family = await index_family(conn, index)
+    assert family & set(await scanned_indexes(statement, parameters)), statement
+
+
+async def test_cursor_page_uses_live_rows_index(client, history):
+    first = await client.get("/api/v1/transactions", headers=history["headers"])
+    cursor = first.json()["pagination"]["next_cursor"]
+
+    with captured_selects() as statements:
+        ok(
+            await client.get(
+                "/api/v1/transactions",
+                params={"after": cursor},
+                headers=history["headers"],
+            )
+        )
+    statement, parameters = statements[0]
+
+    async with async_engine.connect() as conn:
+        family = await index_family(
+            conn, "ix_transactions_user_id_transaction_time_live"
+        )
+    assert family & set(await scanned_indexes(statement, parameters)), statement